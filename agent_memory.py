@@ -0,0 +1,79 @@
+import threading
+
+from rate_limiter import estimate_tokens
+
+# Memory policy for the swarms agents reused across main_loop iterations.
+#
+# An Agent keeps every task and response in its short-term memory and sends
+# the whole history with each call, so a long-running loop pays for a prompt
+# that grows with every file. Each design and code task is self-contained
+# (a regeneration carries its validation errors in the task), so the
+# default is to reset the agents to their system prompt before every call.
+# "window" keeps the most recent messages that fit in a token budget
+# instead, counted with tiktoken when it is installed and its encoding is
+# available offline, and the ~4 characters per token estimate otherwise.
+
+POLICIES = ("reset", "window", "keep")
+ENCODING = "cl100k_base"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _load_encoding():
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(ENCODING)
+            except Exception:
+                # Not installed, or the encoding isn't cached and can't be downloaded
+                _encoding = False
+    return _encoding
+
+def count_tokens(text):
+    encoding = _load_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens([{"content": text}])
+
+def _message_tokens(message):
+    return count_tokens(f"{message['role']}: {message['content']}")
+
+
+class MemoryPolicy:
+    def __init__(self, mode="reset", max_tokens=4000):
+        if mode not in POLICIES:
+            raise ValueError(f"unknown memory policy {mode!r}, expected one of {', '.join(POLICIES)}")
+        self.mode = mode
+        self.max_tokens = max_tokens
+        # id(agent) -> number of messages the agent started with (system
+        # prompt, rules, tool schemas), which are never dropped
+        self._baseline = {}
+
+    def attach(self, agent):
+        self._baseline[id(agent)] = len(agent.short_memory.conversation_history)
+
+    # Trim an agent's memory before its next call
+    def apply(self, agent):
+        if self.mode == "keep":
+            return
+        history = agent.short_memory.conversation_history
+        # Agents attached before this policy replaced another start with just their system prompt
+        baseline = self._baseline.get(id(agent), 1)
+        if self.mode == "reset":
+            del history[baseline:]
+            return
+        budget = self.max_tokens
+        keep = len(history)
+        for index in range(len(history) - 1, baseline - 1, -1):
+            budget -= _message_tokens(history[index])
+            if budget < 0:
+                break
+            keep = index
+        del history[baseline:keep]
+
+    # Tokens an agent's memory would add to its next prompt
+    def tokens(self, agent):
+        return sum(_message_tokens(message) for message in agent.short_memory.conversation_history)
@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Nearest-rank percentile over a list of samples
+def percentile(samples, p):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+# Run the fake server in its own process so its CPU time is not billed to the pipeline
+@contextlib.contextmanager
+def fake_server(args):
+    command = [
+        sys.executable, os.path.join(HERE, "fake_groq_server.py"),
+        "--latency", args.latency,
+        "--tokens-per-sec", str(args.tokens_per_sec),
+        "--error-rate-429", str(args.error_rate_429),
+        "--error-rate-5xx", str(args.error_rate_5xx),
+    ]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        if not line.startswith("Listening on "):
+            raise RuntimeError("fake Groq server failed to start")
+        yield line.split("Listening on ", 1)[1].strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+# CPU time of child processes that have exited and been waited for (the
+# validation pool; the fake server is still running while this is read)
+def child_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def run_benchmark(args):
+    with fake_server(args) as base_url:
+        os.environ["GROQ_BASE_URL"] = base_url
+        os.environ.setdefault("GROQ_API_KEY", "fake-benchmark-key")
+        # The fake server is not rate limited; keep our limiter out of the way
+        os.environ.setdefault("GROQ_RPM", "1000000")
+        os.environ.setdefault("GROQ_TPM", "1000000000")
+        sys.path.insert(0, HERE)
+        import swarm_generator as sg
+
+        timings = defaultdict(list)
+        sg.stage_listeners.append(lambda stage, seconds: timings[stage].append(seconds))
+
+        output_dir = tempfile.mkdtemp(prefix="swarm_bench_")
+        cwd = os.getcwd()
+        os.chdir(output_dir)
+        try:
+            if args.stream:
+                sg.model.stream = sg.async_model.stream = True
+            if args.cache:
+                sg.enable_cache(args.cache)
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            children_start = child_cpu_seconds()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                if args.concurrency == 1 and args.code_concurrency is None:
+                    sg.main_loop(args.iterations)
+                else:
+                    asyncio.run(sg.async_main_loop(
+                        iterations=args.iterations,
+                        designers=args.concurrency,
+                        generators=args.code_concurrency or args.concurrency,
+                    ))
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            # Validation runs in pool processes; their CPU time is only
+            # reported once they have exited
+            sg.shutdown_validation()
+            child_cpu = child_cpu_seconds() - children_start
+        finally:
+            os.chdir(cwd)
+
+    files = len(timings.get("write", []))
+    report = {
+        "iterations": args.iterations,
+        "files": files,
+        "wall_seconds": round(wall, 3),
+        "files_per_sec": round(files / wall, 3) if wall else None,
+        "cpu_ms_per_file": round((cpu + child_cpu) * 1000 / files, 3) if files else None,
+        "validation_cpu_ms_per_file": round(child_cpu * 1000 / files, 3) if files else None,
+        "output_dir": output_dir,
+        "stages": {
+            stage: {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 99) * 1000, 2),
+            }
+            for stage, samples in timings.items()
+            if samples
+        },
+    }
+    return report
+
+def print_report(report):
+    print(f"files written:  {report['files']} / {report['iterations']}")
+    print(f"wall time:      {report['wall_seconds']} s")
+    print(f"throughput:     {report['files_per_sec']} files/s")
+    print(f"cpu per file:   {report['cpu_ms_per_file']} ms ({report['validation_cpu_ms_per_file']} ms validating)")
+    print(f"{'stage':<10}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<10}{stats['count']:>8}{stats['p50_ms']:>12}{stats['p95_ms']:>12}{stats['p99_ms']:>12}")
+    print(f"outputs in:     {report['output_dir']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the generator against a local fake Groq server")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--code-concurrency", type=int, default=None)
+    parser.add_argument("--stream", action="store_true", help="benchmark streaming completions")
+    parser.add_argument("--cache", default=None, help="response cache mode to benchmark with")
+    parser.add_argument("--latency", default="lognormal:0.3,0.5", help="fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Import-time regression check. Imports each entry module in a fresh
+# interpreter under `python -X importtime` and fails when one of them pulls
+# in a heavy dependency at import time, or when its cumulative import time
+# exceeds the budget. Heavy dependencies belong inside the functions that
+# use them (see swarm_generator.build_agents and groq_client).
+
+MODULES = ("cli", "swarm_generator")
+# Each takes seconds to import, or drags in something that does
+HEAVY = ("gradio", "swarms", "groq", "torch", "transformers", "langchain", "litellm", "openai")
+
+
+# Parse `-X importtime` lines ("import time: self [us] | cumulative | name")
+# into (cumulative_us, name) pairs, in the order the imports finished
+def parse_importtime(stderr):
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((int(cumulative), name.strip()))
+    return imports
+
+def measure(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+# Returns the problems found for one module; an empty list means it passed
+def check(module, budget_ms):
+    imports = measure(module)
+    problems = [
+        f"{module} imports {name} at import time"
+        for _, name in imports if name in HEAVY
+    ]
+    total_ms = next(cumulative for cumulative, name in reversed(imports) if name == module) / 1000
+    print(f"{module:<20}{total_ms:>10.1f} ms")
+    if total_ms > budget_ms:
+        slowest = sorted((item for item in imports if item[1] != module), reverse=True)[:5]
+        details = ", ".join(f"{name} {cumulative / 1000:.1f} ms" for cumulative, name in slowest)
+        problems.append(f"{module} took {total_ms:.1f} ms to import, over the {budget_ms:g} ms budget (slowest: {details})")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if entry modules import heavy dependencies or exceed an import-time budget")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--budget-ms", type=float, default=500, help="cumulative import time allowed per module")
+    args = parser.parse_args()
+
+    problems = []
+    for module in args.modules:
+        problems += check(module, args.budget_ms)
+    for problem in problems:
+        print(problem)
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
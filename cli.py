@@ -0,0 +1,187 @@
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Command line entry point for the generator.
+#
+# Only argparse is imported here; each subcommand imports what it needs when
+# it runs, so `--help`, `bench` and short batch jobs don't pay for swarms,
+# groq or gradio unless they actually use them. check_import_time.py keeps it
+# that way.
+
+MAX_REGENERATIONS = 2  # same default as swarm_generator.MAX_REGENERATIONS
+
+
+def add_generate_arguments(parser):
+    parser.add_argument("--iterations", type=int, default=None, help="number of designs to request (default: run forever); a design whose code never passes validation writes no file")
+    parser.add_argument("--concurrency", type=int, default=1, help="designer calls in flight at once")
+    parser.add_argument("--code-concurrency", type=int, default=None, help="swarm code calls in flight at once")
+    parser.add_argument("--max-regenerations", type=int, default=MAX_REGENERATIONS, help="retries for code that fails validation")
+    parser.add_argument("--stream", action="store_true", help="stream completions and write code to disk as it arrives")
+    parser.add_argument("--cache", choices=("readwrite", "record", "replay"), default=None, help="enable the on-disk response cache in this mode")
+    parser.add_argument("--cache-path", default="groq_cache.sqlite", help="response cache database file")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="seconds before a cached response expires")
+    parser.add_argument("--cache-max-mb", type=float, default=256, help="response cache size cap in megabytes")
+    parser.add_argument("--dedup-threshold", type=float, default=0.5, help="similarity at which a design counts as a repeat (0 disables)")
+    parser.add_argument("--dedup-index", default="design_index.bin", help="near-duplicate index file")
+    parser.add_argument("--journal", default="run_journal.json", help="run journal recording the stage of every item in flight")
+    parser.add_argument("--results-store", default=None, help="store finished files in this content-addressed store instead of the working directory")
+    parser.add_argument("--compression", choices=("zstd", "gzip", "none"), default=None, help="results store compression (default: zstd when installed, else gzip)")
+    parser.add_argument("--search-index", default=None, help="index finished files for full-text search in this SQLite file")
+    parser.add_argument("--reuse-threshold", type=float, default=None,
+                        help="serve an indexed file whose design is at least this similar (0-1) instead of generating code")
+    parser.add_argument("--ledger", default="cost_ledger.jsonl", help="append the tokens and cost of every call and finished file to this file")
+    parser.add_argument("--prices", default=None, help="JSON file of {model: [usd_per_million_prompt, usd_per_million_completion]} overriding the built-in prices")
+    parser.add_argument("--hourly-tokens", type=int, default=None, help="token budget per rolling hour")
+    parser.add_argument("--daily-tokens", type=int, default=None, help="token budget per rolling day")
+    parser.add_argument("--hourly-usd", type=float, default=None, help="cost budget per rolling hour")
+    parser.add_argument("--daily-usd", type=float, default=None, help="cost budget per rolling day")
+    parser.add_argument("--budget-exhausted", choices=("wait", "stop"), default="wait", help="wait for the budget window to free up, or end the run")
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-summary", default=None, help="append a JSON metrics summary to this file periodically")
+    parser.add_argument("--metrics-interval", type=float, default=60, help="seconds between JSON metrics summaries")
+    parser.add_argument("--designer-model", default=None, help="model for organizational structures (default: $DESIGNER_MODEL or llama-3.1-8b-instant)")
+    parser.add_argument("--code-model", default=None, help="model for swarm code (default: $CODE_MODEL or llama-3.3-70b-versatile)")
+    parser.add_argument("--no-escalation", action="store_true", help="don't redo a failed item's design with the code model")
+    parser.add_argument("--no-templates", action="store_true", help="send every design to the code generator, even when a template covers it")
+    parser.add_argument("--agent-memory", choices=("reset", "window", "keep"), default="reset",
+                        help="what the sync loop's agents remember between calls: nothing, a token window, or everything")
+    parser.add_argument("--memory-tokens", type=int, default=4000, help="token budget of the --agent-memory window")
+    parser.add_argument("--hedge", action="store_true", help="resend calls slower than a tracked latency percentile and take the first answer")
+    parser.add_argument("--hedge-percentile", type=float, default=95, help="latency percentile after which a call is hedged")
+    parser.add_argument("--hedge-budget", type=float, default=0.05, help="most extra requests hedging may add, as a fraction of calls")
+    parser.add_argument("--max-connections", type=int, default=None, help="size of the shared HTTP connection pool (default: sized to the concurrency)")
+
+# Enough pooled connections for every call the loop can have in flight
+def pool_size(args):
+    if args.max_connections is not None:
+        return args.max_connections
+    if args.concurrency == 1 and args.code_concurrency is None:
+        connections = 1
+    else:
+        connections = args.concurrency + (args.code_concurrency or args.concurrency)
+    # Room for a hedge next to each call in flight
+    return connections * 2 if args.hedge else max(2, connections)
+
+def generate(args):
+    sys.path.insert(0, HERE)
+    import asyncio
+    import swarm_generator as sg
+    import transport
+    from metrics import SummaryWriter, serve_metrics
+
+    transport.configure(max_connections=pool_size(args))
+    sg.configure_models(designer=args.designer_model, code=args.code_model, escalate=not args.no_escalation)
+    if args.stream:
+        sg.model.stream = sg.async_model.stream = True
+    if args.cache:
+        sg.enable_cache(args.cache, path=args.cache_path, ttl=args.cache_ttl, max_mb=args.cache_max_mb)
+    sg.use_templates = not args.no_templates
+    sg.configure_memory(args.agent_memory, max_tokens=args.memory_tokens)
+    if args.hedge:
+        sg.enable_hedging(percentile=args.hedge_percentile, budget=args.hedge_budget)
+    if args.dedup_threshold > 0:
+        sg.enable_dedup(args.dedup_index, threshold=args.dedup_threshold)
+    sg.enable_journal(args.journal, resume=args.resume)
+    if args.results_store:
+        sg.enable_results_store(args.results_store, compression=args.compression)
+    sg.enable_ledger(args.ledger, prices_path=args.prices)
+    limits = {"hourly_tokens": args.hourly_tokens, "daily_tokens": args.daily_tokens, "hourly_usd": args.hourly_usd, "daily_usd": args.daily_usd}
+    if any(limits.values()):
+        sg.enable_budget(on_exhausted=args.budget_exhausted, **limits)
+    if args.search_index or args.reuse_threshold is not None:
+        sg.enable_search(args.search_index or "search_index.sqlite", reuse=args.reuse_threshold)
+    if args.metrics_port is not None:
+        serve_metrics(sg.registry, args.metrics_port)
+    summary_writer = None
+    if args.metrics_summary:
+        summary_writer = SummaryWriter(sg.registry, args.metrics_summary, interval=args.metrics_interval, rate_counter=sg.files_written).start()
+
+    try:
+        if args.concurrency == 1 and args.code_concurrency is None:
+            sg.main_loop(args.iterations, max_regenerations=args.max_regenerations)
+        else:
+            asyncio.run(sg.async_main_loop(
+                iterations=args.iterations,
+                designers=args.concurrency,
+                generators=args.code_concurrency or args.concurrency,
+                max_regenerations=args.max_regenerations,
+            ))
+    finally:
+        if summary_writer is not None:
+            summary_writer.stop()
+        sg.ledger.close()
+        print(f"Spent: {sg.ledger.summary()}")
+
+def bench(args, benchmark_arguments):
+    sys.path.insert(0, HERE)
+    import benchmark
+    benchmark.main(benchmark_arguments)
+
+def smoke(args, smoke_arguments):
+    sys.path.insert(0, HERE)
+    import smoke_runner
+    smoke_runner.main(smoke_arguments)
+
+def search(args, search_arguments):
+    sys.path.insert(0, HERE)
+    import search_index
+    search_index.main(search_arguments)
+
+def costs(args, cost_arguments):
+    sys.path.insert(0, HERE)
+    import cost_ledger
+    cost_ledger.main(cost_arguments)
+
+def serve_ui(args):
+    sys.path.insert(0, HERE)
+    import ui
+    ui.build_ui().launch(server_name=args.host, server_port=args.port, share=args.share)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate organizational structures and swarm code")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subcommands.add_parser("generate", help="run the designer -> code generator pipeline")
+    add_generate_arguments(generate_parser)
+    generate_parser.add_argument("--resume", action="store_true", help="continue the run recorded in the journal instead of starting over")
+    generate_parser.set_defaults(handler=generate)
+
+    resume_parser = subcommands.add_parser("resume", help="continue the run recorded in the journal (generate --resume)")
+    add_generate_arguments(resume_parser)
+    resume_parser.set_defaults(handler=generate, resume=True)
+
+    # Everything after `bench`, `smoke`, `search` or `costs`, --help included, goes to
+    # benchmark.py, smoke_runner.py, search_index.py or cost_ledger.py to parse
+    subcommands.add_parser("bench", add_help=False, help="benchmark against a local fake Groq server (arguments go to benchmark.py)")
+    subcommands.add_parser("smoke", add_help=False, help="run generated files against local groq/swarms/gradio stubs (arguments go to smoke_runner.py)")
+    subcommands.add_parser("search", add_help=False, help="index and search generated files (arguments go to search_index.py)")
+    subcommands.add_parser("costs", add_help=False, help="report spend from the cost ledger (arguments go to cost_ledger.py)")
+
+    ui_parser = subcommands.add_parser("serve-ui", help="serve a Gradio UI that designs and generates one swarm per click")
+    ui_parser.add_argument("--host", default="127.0.0.1")
+    ui_parser.add_argument("--port", type=int, default=7860)
+    ui_parser.add_argument("--share", action="store_true", help="create a public Gradio share link")
+    ui_parser.set_defaults(handler=serve_ui)
+
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "bench":
+        bench(args, extra)
+        return
+    if args.command == "smoke":
+        smoke(args, extra)
+        return
+    if args.command == "search":
+        search(args, extra)
+        return
+    if args.command == "costs":
+        costs(args, extra)
+        return
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
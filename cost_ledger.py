@@ -0,0 +1,306 @@
+import argparse
+import collections
+import json
+import os
+import threading
+import time
+
+# Token and cost ledger for Groq calls, and a budget scheduler on top of it.
+#
+# Every API call is recorded with its model, pipeline stage, prompt and
+# completion tokens and its price from PRICES; every finished item (a file
+# that was written, or an item given up on) is recorded with the tokens and
+# cost of all the calls made for it. Records are buffered and appended to a
+# JSON-lines file in batches, one write per batch, so recording a call costs
+# no I/O and several processes can share a ledger file.
+#
+# Spend over the last hour and day is kept as running totals over a sliding
+# window, seeded from the ledger file at startup, so a budget check is
+# cheap and a restarted run still sees what it spent before.
+#
+#   python cost_ledger.py report cost_ledger.jsonl --since 24
+
+# USD per million (prompt, completion) tokens; models not listed are
+# recorded with their tokens but no cost. Override with --prices FILE.
+PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama3-8b-8192": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-70b-versatile": (0.59, 0.79),
+    "llama3-70b-8192": (0.59, 0.79),
+    "mixtral-8x7b-32768": (0.24, 0.24),
+    "gemma2-9b-it": (0.20, 0.20),
+}
+HOUR = 3600
+DAY = 24 * HOUR
+# Which running total a budget limits
+TOKENS, COST = 0, 1
+
+
+def load_prices(path):
+    with open(path) as f:
+        overrides = json.load(f)
+    prices = dict(PRICES)
+    prices.update({model: tuple(price) for model, price in overrides.items()})
+    return prices
+
+def call_cost(model, prompt_tokens, completion_tokens, prices=PRICES):
+    price = prices.get(model)
+    if price is None:
+        return 0.0
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+# Tokens and cost spent in the last `seconds`, as running totals over the
+# calls still inside the window
+class _Window:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.entries = collections.deque()  # (time, tokens, cost)
+        self.totals = [0, 0.0]
+
+    def add(self, when, tokens, cost):
+        self.entries.append((when, tokens, cost))
+        self.totals[TOKENS] += tokens
+        self.totals[COST] += cost
+
+    def expire(self, now):
+        while self.entries and self.entries[0][0] <= now - self.seconds:
+            _, tokens, cost = self.entries.popleft()
+            self.totals[TOKENS] -= tokens
+            self.totals[COST] -= cost
+
+    # Seconds until enough spend ages out of the window to take `total` below `limit`
+    def seconds_until_below(self, now, total, limit):
+        excess = self.totals[total] - limit
+        freed = 0
+        for when, *spent in self.entries:
+            freed += spent[total]
+            if freed > excess:
+                return max(0.0, when + self.seconds - now)
+        return 0.0
+
+
+class CostLedger:
+    def __init__(self, path=None, prices=None, batch_size=100, flush_seconds=5.0):
+        self.path = path
+        self.prices = prices or PRICES
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.windows = {HOUR: _Window(HOUR), DAY: _Window(DAY)}
+        self.totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "valid_files": 0, "dropped": 0}
+        self.unpriced = set()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            now = time.time()
+            for entry in read_entries(path, since=now - DAY):
+                if entry["kind"] == "call":
+                    for window in self.windows.values():
+                        window.add(entry["t"], entry["prompt_tokens"] + entry["completion_tokens"], entry["cost"])
+
+    def _append(self, entry):
+        self._pending.append(json.dumps(entry) + "\n")
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self.path or not self._pending:
+            self._pending.clear()
+            return
+        with open(self.path, "a") as f:
+            f.write("".join(self._pending))
+        self._pending.clear()
+
+    # Record one API call; returns its cost
+    def record_call(self, model, stage, prompt_tokens, completion_tokens):
+        cost = call_cost(model, prompt_tokens, completion_tokens, self.prices)
+        now = time.time()
+        with self._lock:
+            if model not in self.prices:
+                self.unpriced.add(model)
+            for window in self.windows.values():
+                window.add(now, prompt_tokens + completion_tokens, cost)
+            self.totals["calls"] += 1
+            self.totals["prompt_tokens"] += prompt_tokens
+            self.totals["completion_tokens"] += completion_tokens
+            self.totals["cost"] += cost
+            self._append({"t": now, "kind": "call", "model": model, "stage": stage,
+                          "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cost": cost})
+        return cost
+
+    # Record a finished item: `path` is the file it was written to, or None
+    # when it was given up on; `usage` is (prompt_tokens, completion_tokens, cost)
+    # over all its calls
+    def record_item(self, path, usage, design_model=None, code_model=None):
+        prompt_tokens, completion_tokens, cost = usage
+        with self._lock:
+            self.totals["valid_files" if path else "dropped"] += 1
+            self._append({"t": time.time(), "kind": "item", "path": path, "valid": path is not None,
+                          "design_model": design_model, "code_model": code_model,
+                          "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cost": cost})
+
+    # (tokens, cost) spent in the last `seconds` (HOUR or DAY)
+    def spent(self, seconds):
+        with self._lock:
+            window = self.windows[seconds]
+            window.expire(time.time())
+            return tuple(window.totals)
+
+    def seconds_until_below(self, seconds, total, limit):
+        with self._lock:
+            window = self.windows[seconds]
+            now = time.time()
+            window.expire(now)
+            return window.seconds_until_below(now, total, limit)
+
+    def summary(self):
+        with self._lock:
+            totals = dict(self.totals)
+        valid = totals["valid_files"]
+        tokens = totals["prompt_tokens"] + totals["completion_tokens"]
+        per_file = f", ${totals['cost'] / valid:.4f} per valid file" if valid else ""
+        return f"{totals['calls']} calls, {tokens} tokens, ${totals['cost']:.4f}; {valid} valid files{per_file}"
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+
+
+def read_entries(path, since=None):
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A batch cut short by a crash
+                continue
+            if since is None or entry["t"] >= since:
+                yield entry
+
+
+# Hourly and daily budgets in tokens and/or USD. As spend nears a limit the
+# run moves to cheaper paths (tight), then slows down, then waits for the
+# window to free up or stops (exhausted).
+class BudgetScheduler:
+    def __init__(self, ledger, hourly_tokens=None, daily_tokens=None, hourly_usd=None, daily_usd=None,
+                 cheap_at=0.5, slow_at=0.8, max_delay=30.0, on_exhausted="wait", on_throttle=None):
+        if on_exhausted not in ("wait", "stop"):
+            raise ValueError(f"on_exhausted must be 'wait' or 'stop', not {on_exhausted!r}")
+        self.ledger = ledger
+        self.limits = [
+            (seconds, total, limit)
+            for seconds, total, limit in (
+                (HOUR, TOKENS, hourly_tokens), (DAY, TOKENS, daily_tokens), (HOUR, COST, hourly_usd), (DAY, COST, daily_usd),
+            )
+            if limit
+        ]
+        self.cheap_at = cheap_at
+        self.slow_at = slow_at
+        self.max_delay = max_delay
+        self.on_exhausted = on_exhausted
+        self.on_throttle = on_throttle
+
+    # Fraction of the most used budget spent so far
+    def pressure(self):
+        return max((self.ledger.spent(seconds)[total] / limit for seconds, total, limit in self.limits), default=0.0)
+
+    def tight(self):
+        return self.pressure() >= self.cheap_at
+
+    # Seconds to hold the next call: none below slow_at, rising to max_delay
+    # at the limit, and past it until the window has room again
+    def delay(self, pressure):
+        if pressure < self.slow_at:
+            return 0.0
+        if pressure < 1:
+            return self.max_delay * (pressure - self.slow_at) / (1 - self.slow_at)
+        return max((self.ledger.seconds_until_below(seconds, total, limit)
+                    for seconds, total, limit in self.limits if self.ledger.spent(seconds)[total] >= limit), default=0.0)
+
+    # (action, seconds) for the next call: ("go", 0), ("slowed", s),
+    # ("waited", s) or ("stopped", 0)
+    def next_step(self):
+        pressure = self.pressure()
+        if pressure >= 1 and self.on_exhausted == "stop":
+            action, seconds = "stopped", 0.0
+        else:
+            seconds = self.delay(pressure)
+            action = "go" if seconds <= 0 else "slowed" if pressure < 1 else "waited"
+        if action != "go":
+            print(f"Budget at {pressure:.0%}: {action}{f' for {seconds:.1f} s' if seconds else ''}")
+            if self.on_throttle is not None:
+                self.on_throttle(action, seconds)
+        return action, seconds
+
+    # Hold the caller as the budget requires; False when the run should stop
+    def admit(self):
+        while True:
+            action, seconds = self.next_step()
+            if action == "stopped":
+                return False
+            time.sleep(seconds)
+            if action != "waited":
+                return True
+
+    async def admit_async(self):
+        import asyncio
+        while True:
+            action, seconds = self.next_step()
+            if action == "stopped":
+                return False
+            await asyncio.sleep(seconds)
+            if action != "waited":
+                return True
+
+
+# Spend grouped by stage and model, and cost per valid file
+def report(entries):
+    calls = collections.defaultdict(lambda: [0, 0, 0, 0.0])  # (stage, model) -> calls, prompt, completion, cost
+    items = {"valid": [], "dropped": []}
+    for entry in entries:
+        if entry["kind"] == "call":
+            row = calls[(entry["stage"] or "-", entry["model"])]
+            row[0] += 1
+            row[1] += entry["prompt_tokens"]
+            row[2] += entry["completion_tokens"]
+            row[3] += entry["cost"]
+        else:
+            items["valid" if entry["valid"] else "dropped"].append(entry)
+    return calls, items
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report on a token and cost ledger")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="spend by stage and model, and cost per valid file")
+    report_parser.add_argument("path", nargs="?", default="cost_ledger.jsonl")
+    report_parser.add_argument("--since", type=float, default=None, metavar="HOURS", help="only the last HOURS hours")
+    report_parser.add_argument("--top", type=int, default=5, help="most expensive files to list")
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.since * HOUR if args.since is not None else None
+    calls, items = report(read_entries(args.path, since=since))
+    print(f"{'stage':<10}{'model':<28}{'calls':>7}{'prompt':>10}{'completion':>12}{'cost':>11}")
+    for (stage, model), (count, prompt_tokens, completion_tokens, cost) in sorted(calls.items()):
+        print(f"{stage:<10}{model:<28}{count:>7}{prompt_tokens:>10}{completion_tokens:>12}{cost:>11.4f}")
+    total = sum(row[3] for row in calls.values())
+    tokens = sum(row[1] + row[2] for row in calls.values())
+    valid, dropped = items["valid"], items["dropped"]
+    print(f"Total: {sum(row[0] for row in calls.values())} calls, {tokens} tokens, ${total:.4f}")
+    print(f"Files: {len(valid)} valid, {len(dropped)} items dropped (${sum(item['cost'] for item in dropped):.4f} spent on them)")
+    if valid:
+        # Everything spent (dropped items, failed attempts) over what it produced,
+        # next to what the valid files' own calls cost
+        print(f"Cost per valid file: ${total / len(valid):.4f} overall, "
+              f"${sum(item['cost'] for item in valid) / len(valid):.4f} for the file's own calls")
+        for item in sorted(valid, key=lambda item: item["cost"], reverse=True)[:args.top]:
+            print(f"  ${item['cost']:.4f}  {item['prompt_tokens'] + item['completion_tokens']:>7} tok  "
+                  f"{item['code_model'] or '-':<24}  {item['path']}")
+
+if __name__ == "__main__":
+    main()
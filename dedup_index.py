@@ -0,0 +1,185 @@
+import array
+import json
+import os
+import re
+import threading
+import zlib
+from typing import NamedTuple
+
+# Near-duplicate index over organizational designer outputs.
+#
+# Texts are normalized to lowercase words, template labels and stopwords are
+# dropped, and the remaining word bigrams are hashed into a one-permutation
+# MinHash signature of NUM_BINS values (one hash per shingle rather than one
+# per permutation, so signing is linear in the text). Signatures are banded
+# for LSH: two texts become candidates when all ROWS values of any band agree,
+# and candidates are confirmed by the fraction of matching bins, which
+# estimates their Jaccard similarity. A lookup is NUM_BINS // ROWS dict probes
+# plus a handful of verifications, independent of how many entries there are.
+#
+# Persistence is two append-only files: `path` holds the fixed-width
+# signatures (loaded with a single array read) and `path + ".labels"` one JSON
+# label per line.
+
+NUM_BINS = 32
+ROWS = 4
+BANDS = NUM_BINS // ROWS
+_MASK64 = (1 << 64) - 1
+_BIN_SHIFT = 64 - (NUM_BINS - 1).bit_length()
+_VALUE_MASK = (1 << 56) - 1
+_DENSIFIED = 1 << 57
+_EMPTY = 1 << 58
+
+_WORD = re.compile(r"[a-z0-9]+")
+_IGNORED = frozenset("""
+    a an and are as at be by for from has have in into is it its of on or that the this to with will
+    organization mission agent agents use case swarm architecture new structure organizational
+""".split())
+
+def normalize(text):
+    return [word for word in _WORD.findall(text.lower()) if word not in _IGNORED]
+
+def signature(text):
+    words = normalize(text)
+    shingles = {" ".join(pair) for pair in zip(words, words[1:])} or set(words)
+    bins = [_EMPTY] * NUM_BINS
+    for shingle in shingles:
+        # crc32 is fast and stable across processes; the multiply spreads it over 64 bits
+        h = (zlib.crc32(shingle.encode("utf-8")) * 0x9E3779B97F4A7C15) & _MASK64
+        b = h >> _BIN_SHIFT
+        value = h & _VALUE_MASK
+        if value < bins[b]:
+            bins[b] = value
+    # Densify: an empty bin borrows the next filled bin's value, offset by the distance
+    if shingles and _EMPTY in bins:
+        for b in range(NUM_BINS):
+            if bins[b] == _EMPTY:
+                for distance in range(1, NUM_BINS):
+                    value = bins[(b + distance) % NUM_BINS]
+                    if value < _DENSIFIED:
+                        bins[b] = (value + distance * 0x5BD1E995) & _VALUE_MASK | _DENSIFIED
+                        break
+    return bins
+
+# Short human-readable name for an org structure, e.g. its "Organization:" line
+_ORG_LINE = re.compile(r"organization\s*:\s*\**\s*([^\n*#]+)", re.IGNORECASE)
+
+def design_label(text):
+    match = _ORG_LINE.search(text)
+    if match:
+        return match.group(1).strip()
+    return " ".join(text.split())[:80]
+
+
+class Match(NamedTuple):
+    label: str
+    similarity: float
+
+
+class DedupIndex:
+    def __init__(self, path=None, threshold=0.5):
+        self.path = path
+        self.threshold = threshold
+        self._signatures = array.array("Q")
+        self._labels = []
+        self._buckets = [dict() for _ in range(BANDS)]
+        self._lock = threading.Lock()
+        self._signature_file = None
+        self._label_file = None
+        if path:
+            self._load()
+            self._signature_file = open(path, "ab")
+            self._label_file = open(path + ".labels", "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path) or not os.path.exists(self.path + ".labels"):
+            return
+        with open(self.path + ".labels", encoding="utf-8") as f:
+            labels = [json.loads(line) for line in f if line.endswith("\n")]
+        record_size = NUM_BINS * self._signatures.itemsize
+        with open(self.path, "rb") as f:
+            data = f.read()
+        # Only records present in both files survive a torn write
+        count = min(len(labels), len(data) // record_size)
+        self._signatures.frombytes(data[:count * record_size])
+        self._labels = labels[:count]
+        for item in range(count):
+            self._index(item, self._signatures[item * NUM_BINS:(item + 1) * NUM_BINS])
+        if count * record_size != len(data) or count != len(labels):
+            with open(self.path, "wb") as f:
+                self._signatures.tofile(f)
+            with open(self.path + ".labels", "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(label) + "\n" for label in self._labels)
+
+    def _index(self, item, sig):
+        for band, bucket in enumerate(self._buckets):
+            key = hash(tuple(sig[band * ROWS:(band + 1) * ROWS]))
+            existing = bucket.get(key)
+            # Single entries are stored bare to keep 100k+ entries compact
+            if existing is None:
+                bucket[key] = item
+            elif isinstance(existing, list):
+                existing.append(item)
+            else:
+                bucket[key] = [existing, item]
+
+    def _similarity(self, sig, item):
+        stored = self._signatures[item * NUM_BINS:(item + 1) * NUM_BINS]
+        return sum(1 for a, b in zip(sig, stored) if a == b) / NUM_BINS
+
+    def _nearest(self, sig):
+        candidates = set()
+        for band, bucket in enumerate(self._buckets):
+            found = bucket.get(hash(tuple(sig[band * ROWS:(band + 1) * ROWS])))
+            if found is None:
+                continue
+            if isinstance(found, list):
+                candidates.update(found)
+            else:
+                candidates.add(found)
+        best = None
+        for item in candidates:
+            similarity = self._similarity(sig, item)
+            if similarity >= self.threshold and (best is None or similarity > best.similarity):
+                best = Match(self._labels[item], similarity)
+        return best
+
+    # Closest already-seen design at or above the threshold, or None
+    def query(self, text):
+        sig = signature(text)
+        with self._lock:
+            return self._nearest(sig)
+
+    # Record a design unless it is a near-duplicate; returns the match if it is
+    def check_and_add(self, text, label=None):
+        sig = signature(text)
+        with self._lock:
+            match = self._nearest(sig)
+            if match is None:
+                self._add(sig, label or design_label(text))
+            return match
+
+    def add(self, text, label=None):
+        sig = signature(text)
+        with self._lock:
+            self._add(sig, label or design_label(text))
+
+    def _add(self, sig, label):
+        item = len(self._labels)
+        self._signatures.extend(sig)
+        self._labels.append(label)
+        self._index(item, sig)
+        if self._signature_file is not None:
+            # Signature first: a torn label write leaves an unmatched record that load drops
+            array.array("Q", sig).tofile(self._signature_file)
+            self._signature_file.flush()
+            self._label_file.write(json.dumps(label) + "\n")
+            self._label_file.flush()
+
+    def __len__(self):
+        return len(self._labels)
+
+    def close(self):
+        if self._signature_file is not None:
+            self._signature_file.close()
+            self._label_file.close()
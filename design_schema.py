@@ -0,0 +1,186 @@
+import json
+import re
+
+# Schema for the structured fields the organizational designer appends to its
+# answer (see template_renderer.DESIGN_FIELDS_INSTRUCTIONS), and field-level
+# repair for answers where only some of them are missing or malformed.
+#
+# The schema is a small JSON Schema subset (type, required, properties,
+# items, minLength, minItems, maxItems) compiled once into nested closures,
+# so checking an answer doesn't walk the schema dict. Errors come back as
+# (path, message) pairs such as ("agents[1].system_prompt", "is missing"),
+# which is what lets a repair request ask for just the broken fields instead
+# of a whole new design.
+
+DESIGN_SCHEMA = {
+    "type": "object",
+    "required": ["organization", "mission", "use_case", "architecture", "agents"],
+    "properties": {
+        "organization": {"type": "string", "minLength": 1},
+        "mission": {"type": "string", "minLength": 1},
+        "use_case": {"type": "string", "minLength": 1},
+        "architecture": {"type": "string", "minLength": 1},
+        "agents": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": 12,
+            "items": {
+                "type": "object",
+                "required": ["name", "system_prompt"],
+                "properties": {
+                    "name": {"type": "string", "minLength": 1},
+                    "system_prompt": {"type": "string", "minLength": 1},
+                },
+            },
+        },
+    },
+}
+
+_TYPES = {"object": dict, "array": list, "string": str}
+_JSON_FENCE = re.compile(r"```(?:json)?[ \t]*\n(\{.*?\})\s*```", re.DOTALL | re.IGNORECASE)
+_ORGANIZATION = re.compile(r"Organization:\**\s*([^\n*]+)", re.IGNORECASE)
+_ARCHITECTURE = re.compile(r"Swarm Architecture:\**\s*([A-Za-z-]+)", re.IGNORECASE)
+# The whole answer is missing or unparseable, rather than one field
+WHOLE = ""
+
+
+def _join(path, key):
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+# Compile a schema into check(value, path, errors), which appends an error for
+# every violation under `path`
+def compile_schema(schema):
+    checks = []
+    expected = _TYPES[schema["type"]]
+
+    if "minLength" in schema:
+        min_length = schema["minLength"]
+
+        def check_min_length(value, path, errors):
+            if len(value.strip()) < min_length:
+                errors.append((path, "is empty"))
+        checks.append(check_min_length)
+
+    if "minItems" in schema or "maxItems" in schema:
+        min_items, max_items = schema.get("minItems", 0), schema.get("maxItems")
+
+        def check_length(value, path, errors):
+            if len(value) < min_items:
+                errors.append((path, f"needs at least {min_items} item(s)"))
+            elif max_items is not None and len(value) > max_items:
+                errors.append((path, f"has more than {max_items} items"))
+        checks.append(check_length)
+
+    if "items" in schema:
+        check_item = compile_schema(schema["items"])
+
+        def check_items(value, path, errors):
+            for index, item in enumerate(value):
+                check_item(item, _join(path, index), errors)
+        checks.append(check_items)
+
+    if "properties" in schema:
+        properties = [(name, compile_schema(subschema)) for name, subschema in schema["properties"].items()]
+        required = set(schema.get("required", ()))
+
+        def check_properties(value, path, errors):
+            for name, check_property in properties:
+                if name in value and value[name] is not None:
+                    check_property(value[name], _join(path, name), errors)
+                elif name in required:
+                    errors.append((_join(path, name), "is missing"))
+        checks.append(check_properties)
+
+    def check(value, path, errors):
+        if not isinstance(value, expected):
+            errors.append((path, f"must be of type {schema['type']}"))
+            return
+        for check_part in checks:
+            check_part(value, path, errors)
+    return check
+
+_check_design = compile_schema(DESIGN_SCHEMA)
+
+def validate_design(design):
+    errors = []
+    _check_design(design, "", errors)
+    return errors
+
+# The structured fields of a designer answer: the last ```json block, or the
+# whole answer when it is bare JSON (JSON mode). None when there is neither
+# or it doesn't parse.
+def extract_fields(text):
+    blocks = _JSON_FENCE.findall(text)
+    candidate = blocks[-1] if blocks else text.strip()
+    try:
+        fields = json.loads(candidate)
+    except ValueError:
+        return None
+    return fields if isinstance(fields, dict) else None
+
+# (organization, architecture) named by a designer answer, from its
+# structured fields or else its prose; None where it doesn't say
+def design_labels(text):
+    fields = extract_fields(text) or {}
+    labels = []
+    for key, pattern in (("organization", _ORGANIZATION), ("architecture", _ARCHITECTURE)):
+        value = fields.get(key)
+        if not isinstance(value, str) or not value.strip():
+            match = pattern.search(text)
+            value = match.group(1) if match else None
+        labels.append(" ".join(value.split()) if value else None)
+    return tuple(labels)
+
+# (fields, errors) for a designer answer; fields is None when there are none
+def check(text):
+    fields = extract_fields(text)
+    if fields is None:
+        return None, [(WHOLE, "no ```json block with the structured fields")]
+    return fields, validate_design(fields)
+
+# Top-level fields that have to be asked for again
+def broken_fields(errors):
+    if any(path == WHOLE for path, _ in errors):
+        return list(DESIGN_SCHEMA["required"])
+    return sorted({re.split(r"[.\[]", path, 1)[0] for path, _ in errors})
+
+def describe(errors, separator="\n"):
+    return separator.join(f"{path or 'the answer'} {message}" for path, message in errors)
+
+# A small JSON-mode request for just the broken fields, with the answer they
+# belong to as context
+def repair_task(text, errors):
+    fields = broken_fields(errors)
+    shape = {name: DESIGN_SCHEMA["properties"][name] for name in fields}
+    return (
+        "Here is an organizational design:\n\n"
+        f"{text}\n\n"
+        f"Its structured fields have these problems:\n{describe(errors)}\n\n"
+        f"Reply with a JSON object containing only these fields, filled in from the design: {', '.join(fields)}. "
+        f"Their JSON Schema: {json.dumps(shape)}"
+    )
+
+# Merge a repair answer into the fields; returns the repaired fields, or None
+# when the answer doesn't fix every error
+def apply_repair(fields, errors, answer):
+    repair = extract_fields(answer)
+    if repair is None:
+        return None
+    repaired = dict(fields or {})
+    for name in broken_fields(errors):
+        if name in repair:
+            repaired[name] = repair[name]
+    return None if validate_design(repaired) else repaired
+
+# The answer with its structured fields replaced by `fields`
+def with_fields(text, fields):
+    block = f"```json\n{json.dumps(fields, ensure_ascii=False)}\n```"
+    blocks = list(_JSON_FENCE.finditer(text))
+    if blocks:
+        last = blocks[-1]
+        return text[:last.start()] + block + text[last.end():]
+    if extract_fields(text) is not None:
+        return block
+    return f"{text.rstrip()}\n\n{block}"
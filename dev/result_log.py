@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import struct
+
+# Append-only JSONL result log with a fixed-width offset index.
+#
+# Each record is one JSON line in `path`; `path + ".idx"` holds the byte
+# offset of every line as a little-endian uint64, so record n can be read
+# with one seek. Writes are batched: the files are flushed (and fsynced)
+# every `flush_every` records and on close. A crash can only lose or tear
+# the unflushed tail, which is trimmed the next time the log is opened.
+OFFSET = struct.Struct("<Q")
+
+
+class ResultLog:
+    def __init__(self, path, flush_every=32, fsync=True):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self._recover()
+        self._data = open(self.path, "ab")
+        self._index = open(self.index_path, "ab")
+        self._count = os.path.getsize(self.index_path) // OFFSET.size
+        self._pending = 0
+
+    # Trim a torn final line and bring the index back in line with the data
+    def _recover(self):
+        for name in (self.path, self.index_path):
+            if not os.path.exists(name):
+                open(name, "wb").close()
+
+        with open(self.path, "rb+") as data:
+            data_size = data.seek(0, os.SEEK_END)
+            end = data_size
+            while end > 0:
+                data.seek(end - 1)
+                if data.read(1) == b"\n":
+                    break
+                end -= 1
+            if end != data_size:
+                data.truncate(end)
+            data_size = end
+
+        with open(self.index_path, "rb+") as index:
+            index_size = index.seek(0, os.SEEK_END)
+            index.seek(0)
+            offsets = [OFFSET.unpack(chunk)[0] for chunk in iter(lambda: index.read(OFFSET.size), b"") if len(chunk) == OFFSET.size]
+            # Drop entries that point past the surviving data
+            while offsets and offsets[-1] >= data_size:
+                offsets.pop()
+            # Index any lines written after the last indexed one
+            with open(self.path, "rb") as data:
+                if offsets:
+                    data.seek(offsets[-1])
+                    data.readline()
+                position = data.tell()
+                for line in data:
+                    offsets.append(position)
+                    position += len(line)
+            if len(offsets) * OFFSET.size != index_size:
+                index.seek(0)
+                index.truncate()
+                index.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+
+    def append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        offset = self._data.tell()
+        self._data.write(line)
+        self._index.write(OFFSET.pack(offset))
+        self._count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+        return self._count - 1
+
+    def flush(self):
+        # Data before index, so an index entry never points at unwritten data
+        self._data.flush()
+        if self.fsync:
+            os.fsync(self._data.fileno())
+        self._index.flush()
+        if self.fsync:
+            os.fsync(self._index.fileno())
+        self._pending = 0
+
+    def close(self):
+        if not self._data.closed:
+            self.flush()
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    # Random access to record n via the offset index
+    def read(self, n):
+        if not 0 <= n < self._count:
+            raise IndexError(n)
+        self._data.flush()
+        self._index.flush()
+        with open(self.index_path, "rb") as index:
+            index.seek(n * OFFSET.size)
+            offset = OFFSET.unpack(index.read(OFFSET.size))[0]
+        with open(self.path, "rb") as data:
+            data.seek(offset)
+            return json.loads(data.readline())
+
+    def __iter__(self):
+        self._data.flush()
+        with open(self.path, "rb") as data:
+            for line in data:
+                yield json.loads(line)
+
+
+# Convert the legacy agent1_results.json array into an append-only log
+def convert_legacy_json(source, destination):
+    with open(source) as f:
+        records = json.load(f)
+    with ResultLog(destination, flush_every=len(records) + 1) as log:
+        for record in records:
+            log.append(record)
+    return len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain append-only JSONL result logs")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    convert = subcommands.add_parser("convert", help="convert a legacy JSON array file into a JSONL log")
+    convert.add_argument("source")
+    convert.add_argument("destination")
+    reindex = subcommands.add_parser("reindex", help="repair a log and rebuild its offset index")
+    reindex.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        count = convert_legacy_json(args.source, args.destination)
+        print(f"Converted {count} records from {args.source} to {args.destination}")
+    else:
+        if os.path.exists(args.path + ".idx"):
+            os.remove(args.path + ".idx")
+        with ResultLog(args.path) as log:
+            print(f"Indexed {len(log)} records in {args.path}")
+
+if __name__ == "__main__":
+    main()
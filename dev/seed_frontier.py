@@ -0,0 +1,183 @@
+import heapq
+import itertools
+import json
+import os
+from collections import Counter
+
+# Persistent work frontier of seeds for the dev main_loop.
+#
+# Membership is a set, so a seed is only ever queued once however often the
+# designer suggests it. Pending seeds sit in a heap ordered by how many seeds
+# of their architecture have already been processed, so under-represented
+# architectures come first. Priorities go stale as counts change; a popped
+# entry whose priority is out of date is pushed back with the current one
+# instead of reordering the whole heap. The frontier is capped at `max_size`
+# pending seeds (the most represented are evicted first).
+#
+# With a `path`, a restarted run carries on where it stopped. Changes are
+# appended to `path + ".log"` as JSON lines (seeds added, seeds used), so
+# recording one costs a line rather than a rewrite of the whole state; every
+# `compact_every` lines, on eviction and on close, the state is written
+# atomically to `path` and the log starts over. Replaying the log is
+# idempotent, so a crash between the two leaves nothing counted twice. A
+# popped seed is not recorded, so it stays pending until it is marked used.
+
+
+class SeedFrontier:
+    def __init__(self, path=None, architectures=(), max_size=10000, default_architecture="Default", compact_every=1000):
+        self.path = path
+        self.log_path = f"{path}.log" if path else None
+        self.compact_every = compact_every
+        self.architectures = list(architectures)
+        self.max_size = max_size
+        self.default_architecture = default_architecture
+        self.counts = Counter()
+        self.used = set()
+        self._seen = set()
+        self._heap = []
+        self._deferred = []
+        self._sequence = itertools.count()
+        self._log = None
+        self._logged = 0
+        if path:
+            self._load()
+            self._log = open(self.log_path, "a", encoding="utf-8")
+            if self._log.tell():
+                # Fold what was replayed into the saved state (and drop any torn line)
+                self.save()
+
+    # The template a seed asks for, e.g. "Parallel" for "..., Parallel structure"
+    def architecture_of(self, seed):
+        lowered = seed.lower()
+        for architecture in self.architectures:
+            if architecture.lower() in lowered:
+                return architecture
+        return self.default_architecture
+
+    def _push(self, seed):
+        architecture = self.architecture_of(seed)
+        heapq.heappush(self._heap, (self.counts[architecture], next(self._sequence), seed))
+
+    # Append one change to the log; the state is compacted every `compact_every`
+    def _record(self, change):
+        if self._log is None:
+            return
+        self._log.write(json.dumps(change, ensure_ascii=False) + "\n")
+        self._log.flush()
+        self._logged += 1
+        if self._logged >= self.compact_every:
+            self.save()
+
+    # Queue seeds that have never been seen; returns how many were added
+    def extend(self, seeds):
+        added = []
+        for seed in seeds:
+            if not isinstance(seed, str) or seed in self._seen:
+                continue
+            self._seen.add(seed)
+            self._push(seed)
+            added.append(seed)
+        if added:
+            self._record({"seeds": added})
+        if len(self._heap) > self.max_size:
+            self._evict()
+        return len(added)
+
+    # Drop the lowest-priority seeds; trims to 90% of the cap so eviction runs
+    # rarely. Evicted seeds aren't in the log, so the state is compacted.
+    def _evict(self):
+        self._heap = heapq.nsmallest(int(self.max_size * 0.9), self._heap)
+        heapq.heapify(self._heap)
+        if self._log is not None:
+            self.save()
+
+    # Next seed to process, or None when the frontier is empty
+    def pop(self):
+        while self._heap:
+            priority, _, seed = heapq.heappop(self._heap)
+            if seed in self.used:
+                # Used in a change replayed after it was queued
+                continue
+            current = self.counts[self.architecture_of(seed)]
+            if priority < current:
+                heapq.heappush(self._heap, (current, next(self._sequence), seed))
+                continue
+            return seed
+        return None
+
+    # Hand back a popped seed that could not be processed. It is queued again,
+    # or with `retry=False` kept pending for the next run only, so a seed
+    # that keeps failing does not spin the current one. Nothing is recorded:
+    # a popped seed was never taken out of the saved state.
+    def requeue(self, seed, retry=True):
+        if retry:
+            self._push(seed)
+        else:
+            self._deferred.append(seed)
+
+    # Record a processed seed under the architecture it actually produced
+    def mark_used(self, seed, architecture=None):
+        architecture = architecture or self.architecture_of(seed)
+        self._use(seed, architecture)
+        self._record({"used": seed, "architecture": architecture})
+
+    def _use(self, seed, architecture):
+        if seed in self.used:
+            return
+        self._seen.add(seed)
+        self.used.add(seed)
+        self.counts[architecture] += 1
+
+    def __len__(self):
+        return len(self._heap)
+
+    # Write the whole state to `path` and start the log over
+    def save(self):
+        if not self.path:
+            return
+        state = {
+            "pending": [seed for _, _, seed in sorted(self._heap) if seed not in self.used] + self._deferred,
+            "used": sorted(self.used),
+            "seen": sorted(self._seen),
+            "counts": dict(self.counts),
+        }
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        if self._log is not None:
+            self._log.truncate(0)
+        self._logged = 0
+
+    def close(self):
+        if self._log is not None:
+            self.save()
+            self._log.close()
+            self._log = None
+
+    # The last saved state, then the changes logged since
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            self.counts.update(state.get("counts", {}))
+            self.used.update(state.get("used", []))
+            self._seen.update(state.get("seen", []))
+            self._seen.update(self.used)
+            for seed in state.get("pending", []):
+                if seed not in self.used:
+                    self._push(seed)
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # a torn final line
+                if "seeds" in change:
+                    self.extend(change["seeds"])
+                else:
+                    self._use(change["used"], change["architecture"])
@@ -1,9 +1,12 @@
 import os
 import json
+from collections import Counter
 from dotenv import load_dotenv
 from swarms import Agent, GraphWorkflow, Node, NodeType, AgentRearrange
 from groq import Groq
 import gradio as gr
+from result_log import ResultLog, convert_legacy_json
+from seed_frontier import SeedFrontier
 
 # Load environment variables
 load_dotenv()
@@ -100,17 +103,21 @@ seed_examples = [
     "Marketing, Ad Campaign Agent, Spreadsheet-like structure"
 ]
 
-# Function to save JSON results
+# Prioritized, persistent frontier of seeds still to process; seeds already
+# used by an earlier run are skipped when it restarts
+frontier_file_name = "seed_frontier.json"
+seed_frontier = SeedFrontier(
+    path=frontier_file_name,
+    architectures=[name for name in swarm_templates if name != "Default"],
+)
+seed_frontier.extend(seed_examples)
+
+# Append-only log of Agent 1 results (converted once from the legacy JSON array)
 json_file_name = "agent1_results.json"
-def save_to_json(file_name, data):
-    if not os.path.exists(file_name):
-        with open(file_name, "w") as f:
-            json.dump([], f)
-    with open(file_name, "r") as f:
-        existing_data = json.load(f)
-    existing_data.append(data)
-    with open(file_name, "w") as f:
-        json.dump(existing_data, f, indent=4)
+results_log_name = "agent1_results.jsonl"
+if os.path.exists(json_file_name) and not os.path.exists(results_log_name):
+    convert_legacy_json(json_file_name, results_log_name)
+results_log = ResultLog(results_log_name)
 
 # First agent: Organizational structure generation
 first_agent = Agent(
@@ -156,46 +163,71 @@ code_refinement_system = AgentRearrange(
     output_type="all",
 )
 
+_JSON_DECODER = json.JSONDecoder()
+
+# The first JSON object in a response, bare or inside prose or a ``` fence,
+# or None. Decoding starts at each "{" in turn, so braces in the prose and
+# any later objects are left alone.
+def first_json_object(text):
+    start = text.find("{")
+    while start != -1:
+        try:
+            parsed, _ = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict):
+            return parsed
+        start = text.find("{", start + 1)
+    return None
+
+# Fields of an Agent 1 response, checked one by one: a field that is missing
+# or invalid falls back on its own, without throwing away the rest
+def parse_agent1_response(response):
+    text = response if isinstance(response, str) else json.dumps(response)
+    fields = response if isinstance(response, dict) else first_json_object(text) or {}
+
+    org_structure = fields.get("org_structure")
+    if org_structure not in swarm_templates:
+        # Use the first known architecture the answer names, else Default
+        named = [name for name in swarm_templates if name != "Default" and name.lower() in text.lower()]
+        org_structure = min(named, key=lambda name: text.lower().index(name.lower())) if named else "Default"
+
+    new_seeds = fields.get("new_seeds")
+    if not isinstance(new_seeds, list):
+        new_seeds = []
+    return org_structure, [seed for seed in new_seeds if isinstance(seed, str) and seed.strip()]
+
+# Attempts at a seed in one run before it is left for the next
+MAX_SEED_ATTEMPTS = 3
+
 # Main loop
-def main_loop(seed_examples):
-    used_seeds = set()
-    for i, seed in enumerate(seed_examples):
-        if seed in used_seeds:
-            continue
-        
+def main_loop(frontier):
+    failures = Counter()
+    while True:
+        seed = frontier.pop()
+        if seed is None:
+            break
+        i = len(frontier.used)
+
         # Generate organizational structure for the current seed
         task_prompt = first_agent.system_prompt.format(seed=seed)  # Injecting seed into the prompt
         agent1_response = first_agent.run(task=task_prompt)
         
         if not agent1_response:
             print(f"Agent 1 failed to respond for seed: {seed}")
+            failures[seed] += 1
+            frontier.requeue(seed, retry=failures[seed] < MAX_SEED_ATTEMPTS)
             continue
         
-        save_to_json(json_file_name, agent1_response)
+        results_log.append(agent1_response)
 
         # Parse response for organization structure
-        org_structure_response = {}
-        try:
-            # Check if the response is a string and try to parse it as JSON
-            if isinstance(agent1_response, str):
-                org_structure_response = json.loads(agent1_response)
-            else:
-                org_structure_response = agent1_response
-        except json.JSONDecodeError:
-            org_structure_response = {"org_structure": "Default"}  # Default in case of invalid or unstructured response
+        org_structure, new_seeds = parse_agent1_response(agent1_response)
 
-        org_structure = org_structure_response.get("org_structure", "Default")
-
-        if org_structure not in swarm_templates:
-            org_structure = "Default"
-        
         swarm_template = generate_swarm_configuration(org_structure)
 
         # Add new seeds from Agent 1 response
-        new_seeds = org_structure_response.get("new_seeds", [])
-        for new_seed in new_seeds:
-            if new_seed not in seed_examples:
-                seed_examples.append(new_seed)
+        frontier.extend(new_seeds)
 
         # Generate swarm code
         second_agent.system_prompt = second_agent.system_prompt.format(
@@ -213,9 +245,13 @@ def main_loop(seed_examples):
             f.write(agent2_response)  # agent2_response is already a string
         print(f"Saved: {file_name}")
 
-        used_seeds.add(seed)
+        frontier.mark_used(seed, org_structure)
 
 if __name__ == "__main__":
     # Execute the agent flow
     code_refinement_system.run()
-    main_loop(seed_examples)
+    try:
+        main_loop(seed_frontier)
+    finally:
+        results_log.close()
+        seed_frontier.close()
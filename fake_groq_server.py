@@ -0,0 +1,285 @@
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Groq chat-completions endpoint, for measuring the
+# generator's own overhead without touching the real API. Point a client at
+# it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Designer-style answers, shaped like the prose header of the files in results/
+CANNED_ORG_STRUCTURES = [
+    """**New Organizational Structure:**
+
+### Organization: Environmental Conservation
+### Mission: Monitor and analyze environmental data to predict natural disasters
+### Agent: Environmental Monitoring Agent
+### Use Case: Natural disaster prediction and prevention
+
+**Swarm Architecture:** Distributed. Multiple monitoring agents collect and process data independently and share their findings with a central hub.
+
+```json
+{"organization": "Environmental Conservation", "mission": "Monitor and analyze environmental data to predict natural disasters", "use_case": "Natural disaster prediction and prevention", "architecture": "Distributed",
+ "agents": [{"name": "Sensor Monitoring Agent", "system_prompt": "Collect and clean readings from field sensors."},
+            {"name": "Central Hub Agent"}]}
+```""",
+    """**New Organizational Structure:**
+
+### Organization: Smart Transportation
+### Mission: Optimize traffic flow and reduce congestion in urban areas
+### Agent: Traffic Management Agent
+### Use Case: Real-time traffic signal optimization
+
+**Swarm Architecture:** Hierarchical. A supervisor coordinates district team leads, who direct intersection-level worker agents.
+
+```json
+{"organization": "Smart Transportation", "mission": "Optimize traffic flow and reduce congestion in urban areas", "use_case": "Real-time traffic signal optimization", "architecture": "Hierarchical",
+ "agents": [{"name": "Traffic Supervisor", "system_prompt": "Coordinate the district leads and balance signal timing across the city."},
+            {"name": "District Lead", "system_prompt": "Direct intersection agents in your district based on congestion reports."},
+            {"name": "Intersection Agent", "system_prompt": "Adjust signal phases at one intersection from live sensor counts."}]}
+```""",
+    """**New Organizational Structure:**
+
+### Organization: Education
+### Mission: Personalize learning paths for students
+### Agent: Curriculum Planning Agent
+### Use Case: Adaptive course sequencing
+
+**Swarm Architecture:** Sequential. An assessment agent hands results to a planning agent, which hands a plan to a content agent.
+
+```json
+{"organization": "Education", "mission": "Personalize learning paths for students", "use_case": "Adaptive course sequencing", "architecture": "Sequential",
+ "agents": [{"name": "Assessment Agent", "system_prompt": "Assess the student's current level from recent work."},
+            {"name": "Curriculum Planning Agent", "system_prompt": "Plan the next units from the assessment."},
+            {"name": "Content Agent", "system_prompt": "Prepare lesson material for the planned units."}]}
+```""",
+]
+
+# JSON-mode answer to a design repair request (the Distributed design above
+# leaves out a system prompt)
+CANNED_REPAIR = {
+    "agents": [
+        {"name": "Sensor Monitoring Agent", "system_prompt": "Collect and clean readings from field sensors."},
+        {"name": "Central Hub Agent", "system_prompt": "Combine the monitoring agents' findings into disaster forecasts."},
+    ],
+}
+
+FALLBACK_CODE = """Here is the code that implements the swarm AI agent architecture:
+
+```python
+from swarms import Agent, GraphWorkflow, Node, NodeType
+
+agent1 = Agent(agent_name="Agent 1", system_prompt="General task processing", task="Handle task")
+workflow = GraphWorkflow()
+workflow.add_node(Node(id="agent1", type=NodeType.AGENT, agent=agent1))
+```
+"""
+
+def load_canned_code(results_dir=RESULTS_DIR):
+    outputs = []
+    for path in sorted(glob.glob(os.path.join(results_dir, "*.py"))):
+        with open(path) as f:
+            outputs.append(f.read())
+    return outputs or [FALLBACK_CODE]
+
+# Latency specs: "fixed:S", "uniform:LO,HI" or "lognormal:MEDIAN,SIGMA" (seconds)
+def parse_latency(spec):
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Invalid latency spec {spec!r}")
+
+# Split text into pseudo-tokens (~4 characters each) for pacing and usage
+def tokenize(text):
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+class FakeGroqServer:
+    def __init__(self, host="127.0.0.1", port=0, latency="lognormal:0.3,0.5", tokens_per_sec=500.0,
+                 error_rate_429=0.0, error_rate_5xx=0.0, seed=None, results_dir=RESULTS_DIR):
+        self.sample_latency = parse_latency(latency)
+        self.tokens_per_sec = tokens_per_sec
+        self.error_rate_429 = error_rate_429
+        self.error_rate_5xx = error_rate_5xx
+        self.code_outputs = load_canned_code(results_dir)
+        # Chat completion requests received, errors included
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _roll(self):
+        with self._rng_lock:
+            return self._rng.random(), self.sample_latency(self._rng), self._rng.randrange(1 << 30)
+
+    # Designer prompts get an org structure, JSON mode a design repair,
+    # everything else a code file
+    def _completion_text(self, messages, pick, json_mode=False):
+        prompt = " ".join(m.get("content", "") for m in messages)
+        if json_mode:
+            return json.dumps(CANNED_REPAIR)
+        if "organizational structure for a new project" in prompt:
+            return CANNED_ORG_STRUCTURES[pick % len(CANNED_ORG_STRUCTURES)]
+        return self.code_outputs[pick % len(self.code_outputs)]
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self._json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+                length = int(self.headers.get("content-length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                roll, latency, pick = server._roll()
+                with server._rng_lock:
+                    server.requests += 1
+                time.sleep(latency)
+
+                if roll < server.error_rate_429:
+                    return self._json(429, {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                                      {"retry-after": "1", "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1s"})
+                if roll < server.error_rate_429 + server.error_rate_5xx:
+                    return self._json(503, {"error": {"message": "Service unavailable", "type": "internal_server_error"}})
+
+                messages = body.get("messages", [])
+                tokens = tokenize(server._completion_text(messages, pick, (body.get("response_format") or {}).get("type") == "json_object"))
+                if body.get("max_tokens"):
+                    tokens = tokens[:body["max_tokens"]]
+                prompt_tokens = sum(len(tokenize(m.get("content", ""))) for m in messages)
+                usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                         "total_tokens": prompt_tokens + len(tokens)}
+                completion_id = f"chatcmpl-{uuid.uuid4()}"
+                model = body.get("model", "llama-3.3-70b-versatile")
+                if body.get("stream"):
+                    self._stream(completion_id, model, tokens, usage)
+                else:
+                    time.sleep(len(tokens) / server.tokens_per_sec)
+                    self._json(200, {
+                        "id": completion_id,
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                                     "logprobs": None, "finish_reason": "stop"}],
+                        "usage": usage,
+                    })
+
+            def _rate_limit_headers(self):
+                return {"x-ratelimit-limit-requests": "14400", "x-ratelimit-remaining-requests": "14399",
+                        "x-ratelimit-limit-tokens": "1000000", "x-ratelimit-remaining-tokens": "999000"}
+
+            def _json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for name, value in {**self._rate_limit_headers(), **(headers or {})}.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            # Server-sent events paced at tokens_per_sec, like a streamed completion
+            def _stream(self, completion_id, model, tokens, usage):
+                self.send_response(200)
+                self.send_header("content-type", "text/event-stream")
+                self.send_header("transfer-encoding", "chunked")
+                for name, value in self._rate_limit_headers().items():
+                    self.send_header(name, value)
+                self.end_headers()
+                created = int(time.time())
+
+                def chunk(delta, finish_reason=None, extra=None):
+                    payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                               "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}]}
+                    payload.update(extra or {})
+                    self._write_chunk(f"data: {json.dumps(payload)}\n\n")
+
+                try:
+                    chunk({"role": "assistant", "content": ""})
+                    for token in tokens:
+                        time.sleep(1 / server.tokens_per_sec)
+                        chunk({"content": token})
+                    chunk({}, "stop", {"x_groq": {"id": completion_id, "usage": usage}})
+                    self._write_chunk("data: [DONE]\n\n")
+                    self._write_chunk("")
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client stopped reading early (e.g. cut off after the code block)
+                    self.close_connection = True
+
+            def _write_chunk(self, text):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Groq chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", default="lognormal:0.3,0.5", help="fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = FakeGroqServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        tokens_per_sec=args.tokens_per_sec,
+        error_rate_429=args.error_rate_429,
+        error_rate_5xx=args.error_rate_5xx,
+        seed=args.seed,
+    )
+    print(f"Listening on {server.base_url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
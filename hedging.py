@@ -0,0 +1,139 @@
+import asyncio
+import bisect
+import collections
+import threading
+from concurrent.futures import FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
+
+# Hedged requests: when a call has not answered within a high percentile of
+# recent latencies, send the same request again and take whichever answers
+# first. Most of a slow call's latency is queueing on the provider's side, so
+# a second try usually lands on a faster path; with the threshold at p95 only
+# about one call in twenty is ever hedged.
+#
+# The policy tracks latencies per key (model and streaming mode; for
+# streamed calls the latency is the time to first token) and caps hedges at
+# `budget` times the number of calls made. Callers decide how a hedge is paid
+# for; GroqModel only hedges when the rate limiter has room right away.
+
+
+class HedgePolicy:
+    def __init__(self, percentile=95, budget=0.05, window=500, min_samples=20, min_delay=0.05):
+        self.percentile = percentile
+        self.budget = budget
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedges = 0
+        self._recent = {}  # key -> (deque in arrival order, same samples sorted)
+        self._lock = threading.Lock()
+
+    # Seconds to wait before hedging a call, or None while there is too
+    # little history to tell a slow call from a normal one
+    def delay(self, key):
+        with self._lock:
+            recent = self._recent.get(key)
+            if recent is None or len(recent[1]) < self.min_samples:
+                return None
+            ordered = recent[1]
+            rank = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            return max(self.min_delay, ordered[rank])
+
+    # One finished call and how long it took
+    def record(self, key, seconds):
+        with self._lock:
+            self.requests += 1
+            arrivals, ordered = self._recent.setdefault(key, (collections.deque(), []))
+            arrivals.append(seconds)
+            bisect.insort(ordered, seconds)
+            if len(arrivals) > self.window:
+                del ordered[bisect.bisect_left(ordered, arrivals.popleft())]
+
+    # Claim one hedge from the budget. `reserve` is called under the policy's
+    # lock and can veto the hedge (e.g. when the rate limiter has no room).
+    def try_hedge(self, reserve=None):
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            if reserve is not None and not reserve():
+                return False
+            self.hedges += 1
+            return True
+
+
+# Outcome of a race: None when no hedge was sent, otherwise "won" or "lost"
+# from the hedge's point of view
+def _outcome(winner, hedge):
+    if hedge is None:
+        return None
+    return "won" if winner is hedge else "lost"
+
+def _discard_result(future, discard):
+    if future.exception() is None:
+        discard(future.result())
+
+# Run `call` on `executor`; once `delay` seconds pass without an answer and
+# `can_hedge()` agrees, run it a second time. Returns (result, outcome). A
+# blocking call can't be interrupted from outside, so the loser runs to
+# completion in the background and `discard` is applied to its result.
+def race(executor, call, delay, can_hedge, discard):
+    if delay is None:
+        return call(), None
+    primary = executor.submit(call)
+    try:
+        return primary.result(timeout=delay), None
+    except FutureTimeoutError:
+        pass
+    if not can_hedge():
+        return primary.result(), None
+    hedge = executor.submit(call)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winners = [future for future in done if future.exception() is None]
+        if winners:
+            winner = winners[0]
+            for future in winners[1:]:
+                discard(future.result())
+            for future in pending:
+                future.add_done_callback(lambda future: _discard_result(future, discard))
+            return winner.result(), _outcome(winner, hedge)
+        error = error or next(iter(done)).exception()
+    raise error
+
+# asyncio version of race(); the losing task is cancelled, and `cancelled()`
+# is called once for each task cancelled before it answered
+async def race_async(call, delay, can_hedge, discard, cancelled=None):
+    if delay is None:
+        return await call(), None
+    primary = asyncio.ensure_future(call())
+    tasks = {primary}
+    hedge = None
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done and can_hedge():
+            hedge = asyncio.ensure_future(call())
+            tasks.add(hedge)
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            winners = [task for task in done if task.exception() is None]
+            if winners:
+                for task in winners[1:]:
+                    await discard(task.result())
+                return winners[0].result(), _outcome(winners[0], hedge)
+            error = error or next(iter(done)).exception()
+        raise error
+    finally:
+        losers = [task for task in tasks if not task.done()]
+        for task in losers:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for task in losers:
+            if not task.cancelled() and task.exception() is None:
+                # Answered before the cancellation reached it
+                await discard(task.result())
+            elif cancelled is not None:
+                cancelled()
@@ -0,0 +1,153 @@
+import argparse
+import atexit
+import gzip
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# One log file for everything swarms writes through loguru.
+#
+# swarms adds a loguru file sink per module and per agent, each under a
+# fresh UUID name in its own agent_workspace subdirectory, so every run
+# leaves dozens of mostly empty files behind. install() replaces loguru's
+# add() so file sinks are not created; all of them share a single sink
+# instead. That sink only puts records on an in-memory queue, and a
+# background listener writes them to a size-rotated file that is opened on
+# the first record. Callers never wait on disk I/O.
+#
+# install() must run before swarms is imported, since swarms adds its sinks
+# at import time.
+
+DEFAULT_PATH = os.path.join(os.getenv("WORKSPACE_DIR", "agent_workspace"), "swarms.log")
+FORMAT = "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level} | {name}:{function}:{line} | {message}"
+
+_installed = None
+
+
+# Creates the file, and its directory, only when the first record arrives
+class LazyRotatingFileHandler(RotatingFileHandler):
+    def __init__(self, path, max_bytes, backups):
+        super().__init__(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+def _is_file_sink(sink):
+    return isinstance(sink, (str, os.PathLike))
+
+# The directory swarms created for a sink that will now never be written
+def _remove_empty_parent(sink):
+    directory = os.path.dirname(os.fspath(sink))
+    if directory:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            pass
+
+def install(path=DEFAULT_PATH, max_bytes=10 * 1024 * 1024, backups=5, level="INFO"):
+    global _installed
+    if _installed is not None:
+        return _installed
+    from loguru import logger
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, LazyRotatingFileHandler(path, max_bytes, backups))
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger_class = type(logger)
+    original_add = logger_class.add
+    original_remove = logger_class.remove
+
+    def add_shared_sink(target):
+        return original_add(target, QueueHandler(records), level=level, format=FORMAT, colorize=False)
+
+    sink_id = add_shared_sink(logger)
+
+    def add(self, sink, *args, **kwargs):
+        if _is_file_sink(sink):
+            _remove_empty_parent(sink)
+            return sink_id
+        return original_add(self, sink, *args, **kwargs)
+
+    # Callers removing "their" file sink must not remove the shared one
+    def remove(self, handler_id=None):
+        nonlocal sink_id
+        if handler_id == sink_id:
+            return
+        original_remove(self, handler_id)
+        if handler_id is None:
+            sink_id = add_shared_sink(self)
+
+    logger_class.add = add
+    logger_class.remove = remove
+    _installed = listener
+    return listener
+
+
+# Fold an existing workspace's scattered per-run logs into one gzip archive:
+# empty logs are deleted, the rest are appended to `archive` with a header
+# naming the original file and then deleted, and emptied directories are
+# removed. Returns (deleted_empty, archived, removed_directories).
+def compact_workspace(workspace, archive=None, dry_run=False):
+    archive = archive or os.path.join(workspace, "compacted_logs.log.gz")
+    # The consolidated sink's own file stays where it is
+    live_log = os.path.join(workspace, os.path.basename(DEFAULT_PATH))
+    deleted = archived = removed = 0
+    log_files = []
+    for root, _, files in os.walk(workspace):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.endswith(".log") and path != live_log:
+                log_files.append(path)
+
+    output = None
+    try:
+        for log_file in log_files:
+            if os.path.getsize(log_file) == 0:
+                deleted += 1
+            else:
+                archived += 1
+                if not dry_run:
+                    if output is None:
+                        output = gzip.open(archive, "ab")
+                    output.write(f"==> {os.path.relpath(log_file, workspace)} <==\n".encode("utf-8"))
+                    with open(log_file, "rb") as f:
+                        output.write(f.read())
+            if not dry_run:
+                os.remove(log_file)
+    finally:
+        if output is not None:
+            output.close()
+
+    # Bottom-up: a directory goes once it holds nothing but logs and removable directories
+    removable = set()
+    compacted = set(log_files)
+    for root, directories, files in os.walk(workspace, topdown=False):
+        if root == workspace:
+            continue
+        if all(os.path.join(root, name) in compacted for name in files) and all(os.path.join(root, d) in removable for d in directories):
+            removable.add(root)
+            removed += 1
+            if not dry_run:
+                os.rmdir(root)
+    return deleted, archived, removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean up swarms log files in an agent workspace")
+    parser.add_argument("workspace", nargs="?", default=os.getenv("WORKSPACE_DIR", "agent_workspace"))
+    parser.add_argument("--archive", default=None, help="gzip file the non-empty logs are appended to")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be done without changing anything")
+    args = parser.parse_args()
+
+    deleted, archived, removed = compact_workspace(args.workspace, archive=args.archive, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"Would delete {deleted} empty logs, archive {archived} logs and remove {removed} directories")
+    else:
+        print(f"Deleted {deleted} empty logs, archived {archived} logs and removed {removed} directories")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import ast
+import re
+from typing import NamedTuple
+
+# Canonical header of every generated file. The code generator is told it
+# already exists and only writes the architecture-specific body; the
+# boilerplate is spliced in locally instead of being paid for on every call.
+BOILERPLATE = '''import os
+import json
+from dotenv import load_dotenv
+from swarms import Agent, AgentRearrange, GraphWorkflow, Node, NodeType
+from groq import Groq
+import gradio as gr
+from datetime import datetime
+
+# Load environment variables
+load_dotenv()
+api_key = os.getenv("GROQ_API_KEY")
+if not api_key:
+    raise ValueError("GROQ_API_KEY environment variable is not set.")
+
+# Initialize Groq client
+client = Groq(api_key=api_key)
+
+# Define the Groq-based model
+class GroqModel:
+    def __init__(self, client):
+        self.client = client
+
+    def __call__(self, prompt):
+        try:
+            response = self.client.chat.completions.create(
+                messages=[
+                    {"role": "system", "content": "You are a Python code expert."},
+                    {"role": "user", "content": prompt}
+                ],
+                model="llama-3.3-70b-versatile",
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            return f"Error: {e}"
+
+# Initialize the model
+model = GroqModel(client=client)
+'''
+
+_FENCE = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)(?:\n```|\Z)", re.DOTALL | re.IGNORECASE)
+
+# The code inside the first fenced block, or the whole text when there is none
+def extract_code(text):
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def _import_bindings(node):
+    module = node.module if isinstance(node, ast.ImportFrom) else None
+    return [(module, alias.name, alias.asname) for alias in node.names]
+
+def _boilerplate_index():
+    tree = ast.parse(BOILERPLATE)
+    bindings = set()
+    definitions = set()
+    statements = set()
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            bindings.update(_import_bindings(node))
+        elif isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            definitions.add(node.name)
+        else:
+            statements.add(ast.dump(node))
+    comments = {line.strip() for line in BOILERPLATE.splitlines() if line.strip().startswith("#")}
+    return bindings, definitions, statements, comments
+
+_BINDINGS, _DEFINITIONS, _STATEMENTS, _COMMENTS = _boilerplate_index()
+
+# Remove everything from `body` that the boilerplate already provides:
+# repeated imports (trimmed name by name), redefinitions of GroqModel and
+# repeated setup statements such as load_dotenv() or the client/model lines
+def dedupe_against_boilerplate(body):
+    try:
+        tree = ast.parse(body)
+    except SyntaxError:
+        # Not parseable (e.g. truncated); fall back to dropping repeated import lines
+        boilerplate_lines = {line for line in BOILERPLATE.splitlines() if line.startswith(("import ", "from "))}
+        return "\n".join(line for line in body.splitlines() if line not in boilerplate_lines)
+
+    lines = body.split("\n")
+    replacements = {}
+    for node in tree.body:
+        first, last = node.lineno - 1, node.end_lineno - 1
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            kept = [alias for alias, binding in zip(node.names, _import_bindings(node)) if binding not in _BINDINGS]
+            if len(kept) == len(node.names):
+                continue
+            node.names = kept
+            replacement = [ast.unparse(node)] if kept else []
+        elif isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in _DEFINITIONS:
+            first = min([first] + [d.lineno - 1 for d in node.decorator_list])
+            replacement = []
+        elif ast.dump(node) in _STATEMENTS:
+            replacement = []
+        else:
+            continue
+        # Take the boilerplate's own comment lines directly above with it
+        while not replacement and first > 0 and lines[first - 1].strip() in _COMMENTS:
+            first -= 1
+        replacements[first] = (last, replacement)
+
+    output = []
+    index = 0
+    while index < len(lines):
+        if index in replacements:
+            last, replacement = replacements[index]
+            output.extend(replacement)
+            index = last + 1
+            # Don't leave a run of blank lines where a block was removed
+            while not replacement and index < len(lines) and not lines[index].strip() and (not output or not output[-1].strip()):
+                index += 1
+        else:
+            output.append(lines[index])
+            index += 1
+    return "\n".join(output).strip("\n")
+
+def _with_boilerplate(body):
+    return f"{BOILERPLATE}\n{body}\n"
+
+# Build the final file: canonical boilerplate followed by the model's body
+def splice_boilerplate(text):
+    return _with_boilerplate(dedupe_against_boilerplate(extract_code(text)))
+
+
+# Swarms symbols a generated body must use: every Agent, and at least one way
+# of wiring agents together
+REQUIRED_SYMBOLS = ("Agent",)
+WORKFLOW_SYMBOLS = ("GraphWorkflow", "AgentRearrange")
+
+
+class Validation(NamedTuple):
+    ok: bool
+    errors: list
+    code: str
+
+
+# Splice, parse and compile one model response. Pure and picklable, so it can
+# run in a process pool off the generation loop.
+def validate_code(text):
+    body = dedupe_against_boilerplate(extract_code(text))
+    code = _with_boilerplate(body)
+    if not body.strip():
+        return Validation(False, ["response contains no code"], code)
+    try:
+        tree = ast.parse(body)
+        compile(code, "<generated>", "exec")
+    except SyntaxError as e:
+        return Validation(False, [f"syntax error on line {e.lineno} of the code: {e.msg}"], code)
+
+    used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    errors = [f"{name} is never used" for name in REQUIRED_SYMBOLS if name not in used]
+    if not used.intersection(WORKFLOW_SYMBOLS):
+        errors.append(f"agents are not wired together with {' or '.join(WORKFLOW_SYMBOLS)}")
+    return Validation(not errors, errors, code)
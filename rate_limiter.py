@@ -0,0 +1,138 @@
+import asyncio
+import re
+import threading
+import time
+
+# Rough prompt size estimate (~4 characters per token plus per-message overhead)
+def estimate_tokens(messages):
+    return sum(len(m["content"]) // 4 + 4 for m in messages)
+
+# Parse Groq reset durations such as "7.66s", "2m59.56s", "1h2m" or "350ms"
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_duration(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    def __init__(self, capacity, refill_per_sec):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_sec)
+        self.updated = now
+
+    # Seconds until `amount` tokens are available (0 if they already are)
+    def deficit(self, amount):
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_sec
+
+    # Trust the server's view when it is tighter than ours
+    def resync(self, remaining, now):
+        self.refill(now)
+        if remaining is not None and remaining < self.tokens:
+            self.tokens = float(remaining)
+
+
+# Requests/min and tokens/min limiter shared by every GroqModel. Callers
+# reserve capacity up front (the buckets may go negative) and then sleep off
+# their share of the debt, so concurrent callers queue up fairly instead of
+# polling. All state is guarded by a threading lock, which makes one instance
+# safe to share between threads and asyncio tasks.
+class RateLimiter:
+    def __init__(self, requests_per_minute=30, tokens_per_minute=6000, default_max_tokens=2048):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self.default_max_tokens = default_max_tokens
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _delay(self, cost):
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(
+            self.blocked_until - now,
+            self.requests.deficit(1),
+            self.tokens.deficit(cost),
+        )
+
+    def _reserve(self, cost):
+        with self._lock:
+            delay = self._delay(cost)
+            self.requests.tokens -= 1
+            self.tokens.tokens -= cost
+            return delay
+
+    # Reserve only if it needs no wait; for optional requests such as hedges,
+    # which are only worth sending right away and must never push us into a 429
+    def try_acquire(self, cost):
+        with self._lock:
+            if self._delay(cost) > 0:
+                return False
+            self.requests.tokens -= 1
+            self.tokens.tokens -= cost
+            return True
+
+    def request_cost(self, messages, max_tokens=None):
+        return estimate_tokens(messages) + (max_tokens or self.default_max_tokens)
+
+    # Both return the seconds spent waiting for the reservation
+    def acquire(self, cost):
+        delay = self._reserve(cost)
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+    async def acquire_async(self, cost):
+        delay = self._reserve(cost)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return max(delay, 0.0)
+
+    # Hand back the part of a reservation the call did not use
+    def refund(self, reserved, used):
+        if used is None or used >= reserved:
+            return
+        with self._lock:
+            self.tokens.tokens = min(self.tokens.capacity, self.tokens.tokens + reserved - used)
+
+    # Resync the buckets from response or 429 headers
+    def update_from_headers(self, headers):
+        if not headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            retry_after = parse_duration(headers.get("retry-after"))
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                remaining = _int_header(headers, f"x-ratelimit-remaining-{kind}")
+                bucket.resync(remaining, now)
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                # An exhausted limit stays closed until the server says it resets
+                if remaining == 0 and reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
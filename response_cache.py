@@ -0,0 +1,116 @@
+import collections
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+# Raised in replay mode when a request has no recorded response
+class CacheMiss(Exception):
+    pass
+
+
+# On-disk cache of chat completions keyed on the full request (model,
+# messages and sampling params), with a size cap, LRU eviction and TTL.
+#
+# Identical requests are told apart by how many came before them in the run:
+# the n-th design request of a run maps to the n-th recorded design, so a
+# replayed run gets the same sequence of answers as the recorded one instead
+# of the last answer over and over.
+#
+# Modes:
+#   readwrite - serve hits, call the API and store on a miss
+#   record    - always call the API and store (refreshes existing entries)
+#   replay    - serve hits only; a miss raises CacheMiss instead of calling the API
+class ResponseCache:
+    MODES = ("readwrite", "record", "replay")
+
+    def __init__(self, path="groq_cache.sqlite", mode="readwrite", max_bytes=256 * 1024 * 1024, ttl=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {', '.join(self.MODES)}")
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._occurrences = collections.Counter()
+
+    # Key of the next occurrence of a request in this run; take one per call.
+    # The first occurrence keeps the bare request hash.
+    def key(self, request):
+        payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        with self._lock:
+            occurrence = self._occurrences[digest]
+            self._occurrences[digest] += 1
+        return f"{digest}:{occurrence}" if occurrence else digest
+
+    # Cached response for a key, or None when the caller should hit the API
+    def lookup(self, key):
+        if self.mode == "record":
+            return None
+        response = self.get(key)
+        if response is None and self.mode == "replay":
+            raise CacheMiss("replay-only cache has no recorded response for this request")
+        return response
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, size, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, size, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return response
+
+    def store(self, key, response):
+        if self.mode != "replay":
+            self.put(key, response)
+
+    def put(self, key, response):
+        size = len(response.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._size += size - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    # Drop least recently used entries until the cache is back under 90% of the cap
+    def _evict(self):
+        target = self.max_bytes * 0.9
+        while self._size > target:
+            rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                self._size = 0
+                break
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                self._size -= size
+                if self._size <= target:
+                    break
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,249 @@
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import NamedTuple
+
+# Content-addressed store for generated swarm files.
+#
+# A file is stored once per distinct content, under the SHA-256 of its code:
+# objects/ab/cd/abcd....py[.zst|.gz] inside the store's root, so no directory
+# grows past a few hundred entries and two results can never overwrite each
+# other. Blobs are written to a temporary file in their shard directory and
+# hard-linked into place; if the link already exists another writer stored
+# the same content first and the new copy is dropped, which is all the
+# deduplication there is to do.
+#
+# A SQLite index (index.sqlite) records every stored result: the blob it
+# points to, plus organization, architecture, models, token counts and
+# validation status, so results can be queried without opening the blobs.
+# Several results (e.g. from different runs) can point to one blob.
+#
+#   python results_store.py results_store find --architecture Hierarchical
+#   python results_store.py results_store cat 3f2a
+
+COMPRESSIONS = ("zstd", "gzip", "none")
+DEFAULT_COMPRESSION = "zstd" if importlib.util.find_spec("zstandard") else "gzip"
+_SUFFIXES = {"zstd": ".zst", "gzip": ".gz", "none": ""}
+# Columns of a result, in index order
+FIELDS = ("hash", "created", "organization", "architecture", "design_model", "code_model",
+          "prompt_tokens", "completion_tokens", "valid", "errors")
+
+
+class StoredResult(NamedTuple):
+    hash: str
+    path: str
+    new: bool  # False when identical content was already stored
+
+
+def _compress(data, compression, level):
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=level or 10).compress(data)
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=level or 6, mtime=0)
+    return data
+
+def _decompress(data, compression):
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == "gzip":
+        return gzip.decompress(data)
+    return data
+
+
+class ResultsStore:
+    def __init__(self, root="results_store", compression=DEFAULT_COMPRESSION, level=None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}; expected one of {', '.join(COMPRESSIONS)}")
+        self.root = root
+        self.compression = compression
+        self.level = level
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        # Several processes may share a store (see work_queue.py)
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite"), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            "hash TEXT PRIMARY KEY, path TEXT NOT NULL, compression TEXT NOT NULL, "
+            "size INTEGER NOT NULL, stored_size INTEGER NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "id INTEGER PRIMARY KEY, hash TEXT NOT NULL REFERENCES blobs (hash), created REAL NOT NULL, "
+            "organization TEXT, architecture TEXT, design_model TEXT, code_model TEXT, "
+            "prompt_tokens INTEGER, completion_tokens INTEGER, valid INTEGER NOT NULL, errors TEXT)"
+        )
+        for column in ("hash", "organization", "architecture", "valid"):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS results_{column} ON results ({column})")
+
+    @staticmethod
+    def key(code):
+        return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+    def _blob_path(self, digest, compression):
+        return os.path.join("objects", digest[:2], digest[2:4], f"{digest}.py{_SUFFIXES[compression]}")
+
+    # Write a blob atomically; False when the same content is already on disk
+    def _write_blob(self, relative_path, data):
+        path = os.path.join(self.root, relative_path)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.link(temporary, path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            os.unlink(temporary)
+
+    # Store one result; its blob is only written when the content is new
+    def put(self, code, organization=None, architecture=None, design_model=None, code_model=None,
+            prompt_tokens=None, completion_tokens=None, valid=True, errors=None):
+        digest = self.key(code)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT path FROM blobs WHERE hash = ?", (digest,)).fetchone()
+            new = row is None
+            if new:
+                relative_path = self._blob_path(digest, self.compression)
+                data = code.encode("utf-8")
+                stored = _compress(data, self.compression, self.level)
+                new = self._write_blob(relative_path, stored)
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, path, compression, size, stored_size, created) VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, relative_path, self.compression, len(data), len(stored), now),
+                )
+            else:
+                relative_path = row[0]
+            self._conn.execute(
+                "INSERT INTO results (hash, created, organization, architecture, design_model, code_model, "
+                "prompt_tokens, completion_tokens, valid, errors) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, now, organization, architecture, design_model, code_model,
+                 prompt_tokens, completion_tokens, int(bool(valid)), "\n".join(errors) if errors else None),
+            )
+        return StoredResult(digest, os.path.join(self.root, relative_path), new)
+
+    # Full hash for a unique prefix of one
+    def resolve(self, prefix):
+        with self._lock:
+            rows = self._conn.execute("SELECT hash FROM blobs WHERE hash >= ? AND hash < ? LIMIT 2",
+                                      (prefix, prefix + "g")).fetchall()
+        if len(rows) != 1:
+            raise KeyError(f"{'no' if not rows else 'more than one'} stored blob matches {prefix!r}")
+        return rows[0][0]
+
+    def get(self, digest):
+        digest = self.resolve(digest)
+        with self._lock:
+            path, compression = self._conn.execute("SELECT path, compression FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        with open(os.path.join(self.root, path), "rb") as f:
+            return _decompress(f.read(), compression).decode("utf-8")
+
+    # Results matching every given column value, newest first
+    def find(self, limit=None, **filters):
+        unknown = set(filters) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown result fields: {', '.join(sorted(unknown))}")
+        where = " AND ".join(f"{name} = ?" for name in filters) or "1"
+        query = f"SELECT {', '.join(FIELDS)} FROM results WHERE {where} ORDER BY created DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(query, [int(value) if name == "valid" else value for name, value in filters.items()]).fetchall()
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+    # Valid results stored after result `last_id`, oldest first, each with
+    # its id and the path of its blob (for incremental readers such as
+    # search_index.py)
+    def valid_since(self, last_id=0):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT results.id, results.hash, organization, architecture, blobs.path FROM results "
+                "JOIN blobs ON blobs.hash = results.hash WHERE results.id > ? AND valid = 1 ORDER BY results.id",
+                (last_id,),
+            ).fetchall()
+        return [{"id": result_id, "hash": digest, "organization": organization, "architecture": architecture,
+                 "path": os.path.join(self.root, blob_path)}
+                for result_id, digest, organization, architecture, blob_path in rows]
+
+    def stats(self):
+        with self._lock:
+            results, valid, tokens = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(valid), 0), COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM results"
+            ).fetchone()
+            blobs, size, stored_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+            ).fetchone()
+        return {"results": results, "valid": valid, "blobs": blobs, "bytes": size,
+                "stored_bytes": stored_size, "tokens": tokens}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or fill a content-addressed results store")
+    parser.add_argument("root", help="store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="counts, sizes and compression ratio")
+    find_parser = commands.add_parser("find", help="list stored results, newest first")
+    for name in ("organization", "architecture", "design_model", "code_model"):
+        find_parser.add_argument(f"--{name.replace('_', '-')}", dest=name)
+    find_parser.add_argument("--valid", dest="valid", action="store_true", default=None)
+    find_parser.add_argument("--invalid", dest="valid", action="store_false")
+    find_parser.add_argument("--limit", type=int, default=50)
+    cat_parser = commands.add_parser("cat", help="print a stored file by (a prefix of) its hash")
+    cat_parser.add_argument("hash")
+    import_parser = commands.add_parser("import", help="store existing generated files")
+    import_parser.add_argument("paths", nargs="+")
+    import_parser.add_argument("--compression", choices=COMPRESSIONS, default=DEFAULT_COMPRESSION)
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.root, compression=getattr(args, "compression", DEFAULT_COMPRESSION))
+    if args.command == "stats":
+        stats = store.stats()
+        ratio = stats["bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+        print(f"{stats['results']} results ({stats['valid']} valid) in {stats['blobs']} blobs, "
+              f"{stats['bytes']} bytes stored as {stats['stored_bytes']} ({ratio:.1f}x), {stats['tokens']} tokens")
+    elif args.command == "find":
+        filters = {name: getattr(args, name) for name in ("organization", "architecture", "design_model", "code_model", "valid")}
+        for row in store.find(limit=args.limit, **{name: value for name, value in filters.items() if value is not None}):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["created"]))
+            tokens = (row["prompt_tokens"] or 0) + (row["completion_tokens"] or 0)
+            print(f"{row['hash'][:12]}  {stamp}  {'valid' if row['valid'] else 'invalid':<7}  "
+                  f"{row['architecture'] or '-':<14}  {tokens:>6} tok  {row['organization'] or '-'}")
+    elif args.command == "cat":
+        try:
+            sys.stdout.write(store.get(args.hash))
+        except KeyError as e:
+            parser.error(e.args[0])
+    elif args.command == "import":
+        from postprocess import validate_code
+        for path in args.paths:
+            with open(path, encoding="utf-8") as f:
+                code = f.read()
+            # Stored as a run would have published it: the extracted code
+            # with the boilerplate spliced in, which is what was validated
+            validation = validate_code(code)
+            stored = store.put(validation.code, valid=validation.ok, errors=validation.errors)
+            print(f"{stored.hash[:12]}  {'new' if stored.new else 'duplicate':<9}  {path}")
+    store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import itertools
+import json
+import os
+import threading
+
+# Durable record of the items a generator run has in flight.
+#
+# Each item moves through designed -> generated -> validated -> written and
+# carries the payload needed to pick it up from its last stage: the
+# organizational structure, the raw code response, the attempt number and
+# the last validation errors, along with the models that worked on it and
+# the tokens (and cost) its calls have used so far. Written items leave the journal and only bump
+# a counter, so it stays as small as the number of items in flight. Every
+# transition rewrites the whole journal to a temporary file and renames it
+# over the old one, so a crash at any point leaves either the old or the new
+# state on disk, never a torn file.
+
+
+# Add (prompt_tokens, completion_tokens, cost) used by an item's calls to its totals
+def _add_usage(item, usage):
+    if usage is None:
+        return
+    item["prompt_tokens"] = item.get("prompt_tokens", 0) + usage[0]
+    item["completion_tokens"] = item.get("completion_tokens", 0) + usage[1]
+    item["cost"] = item.get("cost", 0.0) + usage[2]
+
+
+class RunJournal:
+    def __init__(self, path=None, resume=False):
+        self.path = path
+        self.items = {}
+        self.started = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+        if path and resume and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.items = state["items"]
+            self.started = state["started"]
+            self.completed = state["completed"]
+        # Designs made by the run being resumed; they count toward its iterations
+        self.resumed_designs = self.started
+        self._ids = itertools.count(max(map(int, self.items), default=-1) + 1)
+        self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        state = {"started": self.started, "completed": self.completed, "items": self.items}
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    def _update(self, item_id, stage, usage=None, **payload):
+        with self._lock:
+            item = self.items[item_id]
+            item.update(stage=stage, **payload)
+            _add_usage(item, usage)
+            self._save()
+
+    # A new organizational structure; returns the id its later stages use
+    def start(self, org_structure, design_model=None, usage=None):
+        with self._lock:
+            item_id = str(next(self._ids))
+            self.items[item_id] = {
+                "stage": "designed", "org_structure": org_structure, "design_model": design_model,
+                "attempt": 0, "errors": None, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0,
+            }
+            _add_usage(self.items[item_id], usage)
+            self.started += 1
+            self._save()
+        return item_id
+
+    # The item starts over from a new design (made by `design_model`)
+    def redesigned(self, item_id, org_structure, design_model, usage=None):
+        self._update(item_id, "designed", usage, org_structure=org_structure, design_model=design_model, attempt=0, errors=None)
+
+    def design_model(self, item_id):
+        return self.items.get(item_id, {}).get("design_model")
+
+    # A copy of everything recorded for an item, or {} once it has left the journal
+    def item(self, item_id):
+        with self._lock:
+            return dict(self.items.get(item_id, {}))
+
+    # `code_model` is the model that wrote the code, "template" when it was
+    # rendered, or "reuse" when it was served from the search index
+    def generated(self, item_id, swarm_code, attempt, code_model=None, usage=None):
+        self._update(item_id, "generated", usage, swarm_code=swarm_code, attempt=attempt, code_model=code_model)
+
+    # Usage of calls that didn't move the item on, e.g. a failed redesign
+    def charge(self, item_id, usage):
+        with self._lock:
+            if item_id in self.items:
+                _add_usage(self.items[item_id], usage)
+                self._save()
+
+    def validated(self, item_id, validation):
+        self._update(item_id, "validated", ok=validation.ok, errors=validation.errors)
+
+    def written(self, item_id):
+        with self._lock:
+            self.items.pop(item_id, None)
+            self.completed += 1
+            self._save()
+
+    # The item was given up on (e.g. out of regeneration budget)
+    def drop(self, item_id):
+        with self._lock:
+            self.items.pop(item_id, None)
+            self._save()
+
+    # Where each unfinished item picks up, as (item_id, org_structure, errors,
+    # attempt, swarm_code). swarm_code is set when only the local validation
+    # and write are left, so no API call is repeated for it.
+    def unfinished(self):
+        for item_id, item in list(self.items.items()):
+            stage = item["stage"]
+            if stage == "designed":
+                yield item_id, item["org_structure"], None, 0, None
+            elif stage == "generated" or (stage == "validated" and item["ok"]):
+                yield item_id, item["org_structure"], item["errors"], item["attempt"], item["swarm_code"]
+            else:
+                yield item_id, item["org_structure"], item["errors"], item["attempt"] + 1, None
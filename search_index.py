@@ -0,0 +1,292 @@
+import argparse
+import ast
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+import design_schema
+
+# Full-text search over generated swarm files, in SQLite FTS5.
+#
+# Each distinct file (keyed by the SHA-256 of its code, like results_store)
+# is one document with four searchable columns: organization, architecture,
+# a description and the code itself. Files indexed by the generator use the
+# organizational design as their description; files picked up from disk get
+# the text their code carries instead (leading comments, agent names, system
+# prompts and descriptions). Queries are ranked with bm25, organization and
+# architecture weighted above the rest, and take a few milliseconds.
+#
+# Indexing is incremental: files are re-read only when their size or mtime
+# changes, and a results store is read from the last result already seen,
+# so `index --watch` can tail a run's output cheaply.
+#
+# closest() is the retrieval side the generator uses to serve a past result
+# instead of calling the code generator (--reuse-threshold).
+#
+#   python search_index.py index results/ generated_code_*.py --store results_store
+#   python search_index.py search "hierarchical healthcare"
+
+# Column weights for bm25: organization, architecture, description, code
+WEIGHTS = (8.0, 6.0, 3.0, 1.0)
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9]+")
+# Ignored when comparing designs for reuse
+STOPWORDS = frozenset(
+    "the and for with that this from into are was were will can each its their them they have has "
+    "agent agents swarm architecture organization mission use case new structure json name system prompt".split()
+)
+_TEXT_KEYWORDS = ("agent_name", "system_prompt", "description", "name")
+
+
+class Match(NamedTuple):
+    key: str
+    path: str
+    organization: str
+    architecture: str
+    score: float  # bm25 (lower is better) from search(); similarity from closest()
+    snippet: str
+
+
+def _key(code):
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+def terms(text):
+    return {word for word in (match.lower() for match in _WORD.findall(text)) if word not in STOPWORDS}
+
+# An FTS5 query matching any of the words, so better matches rank higher
+# instead of partial ones being dropped
+def fts_query(text):
+    words = list(dict.fromkeys(match.lower() for match in _WORD.findall(text)))
+    return " OR ".join(f'"{word}"' for word in words)
+
+# Searchable text a file carries about itself: its leading comments and the
+# names, system prompts and descriptions passed to its agents and swarms
+def describe_code(code):
+    comments = []
+    for line in code.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            comments.append(stripped.lstrip("# "))
+    texts = []
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        tree = None
+    if tree is not None:
+        for node in ast.walk(tree):
+            if isinstance(node, ast.keyword) and node.arg in _TEXT_KEYWORDS and isinstance(node.value, ast.Constant) \
+                    and isinstance(node.value.value, str):
+                texts.append(node.value.value)
+    return "\n".join(comments + texts)
+
+_ARCHITECTURE_COMMENT = re.compile(r"#\s*Swarm architecture:\s*([A-Za-z-]+)", re.IGNORECASE)
+_ORGANIZATION_COMMENT = re.compile(r"^#\s*([^:\n]+):", re.MULTILINE)
+
+def _labels_from_code(code):
+    architecture = _ARCHITECTURE_COMMENT.search(code)
+    organization = _ORGANIZATION_COMMENT.search(code) if architecture else None
+    return (organization.group(1).strip() if organization else None), (architecture.group(1) if architecture else None)
+
+
+class SearchIndex:
+    def __init__(self, path="search_index.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5("
+            "organization, architecture, description, code, key UNINDEXED, path UNINDEXED, "
+            "tokenize = 'porter unicode61')"
+        )
+        # Files already indexed, so unchanged ones are skipped
+        self._conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, key TEXT)")
+        # Last result read from each results store
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stores (root TEXT PRIMARY KEY, last_id INTEGER NOT NULL)")
+
+    # Index one file's code; returns its key. A file already indexed under
+    # the same code is left alone unless this call knows more about it.
+    def add(self, code, organization=None, architecture=None, description=None, path=None):
+        key = _key(code)
+        if organization is None and architecture is None:
+            organization, architecture = _labels_from_code(code)
+        description = description if description is not None else describe_code(code)
+        with self._lock:
+            row = self._conn.execute("SELECT rowid, organization, description FROM documents WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                if row[1] or not organization:
+                    return key
+                self._conn.execute("DELETE FROM documents WHERE rowid = ?", (row[0],))
+            self._conn.execute(
+                "INSERT INTO documents (organization, architecture, description, code, key, path) VALUES (?, ?, ?, ?, ?, ?)",
+                (organization or "", architecture or "", description, code, key, path or ""),
+            )
+        return key
+
+    # Index a file from disk when it is new or has changed since last time
+    def index_file(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns FROM files WHERE path = ?", (path,)).fetchone()
+        if row == (stat.st_size, stat.st_mtime_ns):
+            return False
+        with open(path, encoding="utf-8", errors="replace") as f:
+            source = f.read()
+        description = None
+        try:
+            compile(source, path, "exec")
+            code = source
+        except SyntaxError:
+            # Saved with prose around the code, like the older files in results/;
+            # the prose describes the organization, so it is searchable too
+            from postprocess import extract_code
+            code = extract_code(source)
+            description = f"{source.replace(code, '')}\n{describe_code(code)}"
+        key = self.add(code, description=description, path=path)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, key) VALUES (?, ?, ?, ?)",
+                               (path, stat.st_size, stat.st_mtime_ns, key))
+        return True
+
+    # Files, directories (their *.py files) or glob patterns; returns how many were (re)read
+    def index_paths(self, patterns):
+        indexed = 0
+        for pattern in patterns:
+            if os.path.isdir(pattern):
+                paths = glob.glob(os.path.join(pattern, "*.py"))
+            else:
+                paths = glob.glob(pattern)
+            for path in sorted(paths):
+                indexed += self.index_file(path)
+        return indexed
+
+    # Index the valid results a results store gained since the last call
+    def index_store(self, root):
+        from results_store import ResultsStore
+        root = os.path.abspath(root)
+        with self._lock:
+            row = self._conn.execute("SELECT last_id FROM stores WHERE root = ?", (root,)).fetchone()
+        last_id = row[0] if row else 0
+        store = ResultsStore(root)
+        try:
+            rows = store.valid_since(last_id)
+            for row in rows:
+                code = store.get(row["hash"])
+                self.add(code, row["organization"], row["architecture"], path=row["path"])
+                last_id = row["id"]
+        finally:
+            store.close()
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO stores (root, last_id) VALUES (?, ?)", (root, last_id))
+        return len(rows)
+
+    # Ranked matches for a free-text query, best first
+    def search(self, query, limit=10, architecture=None):
+        expression = fts_query(query)
+        if not expression:
+            return []
+        sql = (
+            "SELECT key, path, organization, architecture, bm25(documents, ?, ?, ?, ?) AS score, "
+            "snippet(documents, 2, '[', ']', '...', 12) FROM documents WHERE documents MATCH ?"
+        )
+        parameters = [*WEIGHTS, expression]
+        if architecture:
+            sql += " AND architecture = ? COLLATE NOCASE"
+            parameters.append(architecture)
+        sql += " ORDER BY score LIMIT ?"
+        parameters.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, parameters).fetchall()
+        return [Match(*row) for row in rows]
+
+    def get_code(self, key):
+        with self._lock:
+            rows = self._conn.execute("SELECT key, code FROM documents WHERE key >= ? AND key < ? LIMIT 2",
+                                      (key, key + "g")).fetchall()
+        if len(rows) != 1:
+            raise KeyError(f"{'no' if not rows else 'more than one'} indexed file matches {key!r}")
+        return rows[0][1]
+
+    # The indexed file whose design is closest to `org_structure`, when its
+    # word overlap (Jaccard, stopwords dropped) reaches `min_similarity` and
+    # the architectures agree; None otherwise
+    def closest(self, org_structure, min_similarity, candidates=20):
+        organization, architecture = design_schema.design_labels(org_structure)
+        wanted = terms(org_structure)
+        if not wanted:
+            return None
+        best = None
+        for match in self.search(org_structure, limit=candidates, architecture=architecture):
+            with self._lock:
+                description = self._conn.execute("SELECT description FROM documents WHERE key = ?", (match.key,)).fetchone()[0]
+            found = terms(f"{match.organization} {match.architecture} {description}")
+            similarity = len(wanted & found) / len(wanted | found) if found else 0.0
+            if similarity >= min_similarity and (best is None or similarity > best.score):
+                best = match._replace(score=similarity)
+        return best
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index and search generated swarm files")
+    parser.add_argument("--index", default="search_index.sqlite", help="search index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index_parser = commands.add_parser("index", help="index new or changed files")
+    index_parser.add_argument("paths", nargs="*", default=["generated_code_*.py"], help="files, directories or glob patterns")
+    index_parser.add_argument("--store", action="append", default=[], help="also index a results store (repeatable)")
+    index_parser.add_argument("--watch", type=float, default=None, metavar="SECONDS", help="keep indexing new outputs at this interval")
+    search_parser = commands.add_parser("search", help="ranked matches for a query")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--architecture", default=None)
+    search_parser.add_argument("--limit", type=int, default=10)
+    search_parser.add_argument("--json", action="store_true", help="print matches as JSON lines")
+    show_parser = commands.add_parser("show", help="print an indexed file by (a prefix of) its key")
+    show_parser.add_argument("key")
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(args.index)
+    if args.command == "index":
+        while True:
+            started = time.perf_counter()
+            indexed = index.index_paths(args.paths) + sum(index.index_store(root) for root in args.store)
+            if indexed or args.watch is None:
+                print(f"Indexed {indexed} new or changed outputs in {time.perf_counter() - started:.2f} s ({index.count()} total)")
+            if args.watch is None:
+                break
+            time.sleep(args.watch)
+    elif args.command == "search":
+        started = time.perf_counter()
+        matches = index.search(args.query, limit=args.limit, architecture=args.architecture)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for match in matches:
+            if args.json:
+                print(json.dumps(match._asdict()))
+            else:
+                print(f"{match.key[:12]}  {match.score:8.2f}  {match.architecture or '-':<14}  {match.organization or '-'}  {match.path}")
+                print(f"              {' '.join(match.snippet.split())}")
+        if not args.json:
+            print(f"{len(matches)} matches in {elapsed_ms:.1f} ms")
+    elif args.command == "show":
+        try:
+            sys.stdout.write(index.get_code(args.key))
+        except KeyError as e:
+            parser.error(e.args[0])
+    index.close()
+
+if __name__ == "__main__":
+    main()
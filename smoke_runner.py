@@ -0,0 +1,248 @@
+import argparse
+import builtins
+import glob
+import importlib
+import json
+import multiprocessing
+import os
+import resource
+import select
+import signal
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Smoke test for generated swarm files: does the file actually run?
+#
+# Each file is executed as __main__ and its process_prompt() called once,
+# with groq, swarms and gradio replaced by the local stubs in smoke_stubs/, so
+# building the client, wiring the agents, running flows and launching the UI
+# all happen without network access or an API key. Files are spread over a pool of worker processes, one per core.
+# A worker imports the stubs and the libraries generated code tends to use
+# once, then forks a child per file. The child inherits the warm imports,
+# runs under CPU-time and address-space limits, and is killed when it
+# exceeds its wall-clock timeout; a crash or hang only costs that child.
+#
+#   python smoke_runner.py generated_code_*.py --report smoke_report.json
+
+STUB_DIR = os.path.join(HERE, "smoke_stubs")
+STUBBED = ("groq", "swarms", "gradio")
+# Imported once per worker when installed, so children don't pay for them
+WARM_MODULES = ("dotenv", "json", "datetime", "numpy", "pandas", "matplotlib.pyplot")
+SMOKE_PROMPT = "Smoke test: describe what this swarm does in one sentence."
+# Characters of a file's stdout/stderr kept in the report
+OUTPUT_TAIL = 2000
+
+
+class SmokeResult(NamedTuple):
+    file: str
+    status: str  # "passed", "failed", "timeout" or "crashed"
+    seconds: float
+    error: str = ""
+    line: int = None  # line of the generated file where it failed
+    extracted: bool = False  # the file had prose around its code
+    groq_calls: int = 0
+    agent_runs: int = 0
+    output: str = ""
+
+
+def _warm_worker():
+    os.environ.setdefault("GROQ_API_KEY", "smoke-test")
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+    sys.path.insert(0, STUB_DIR)
+    sys.path.insert(1, HERE)
+    for name in list(sys.modules):
+        if name.split(".")[0] in STUBBED:
+            del sys.modules[name]
+    for name in STUBBED + WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    for name in STUBBED:
+        if not sys.modules[name].__file__.startswith(STUB_DIR):
+            raise RuntimeError(f"{name} was not replaced by its stub")
+
+# The file's code; files saved with prose around a ```python block (like the
+# older ones in results/) are run from the block
+def load_source(path):
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    try:
+        compile(source, path, "exec")
+        return source, False
+    except SyntaxError:
+        from postprocess import extract_code
+        code = extract_code(source)
+        return code, code != source
+
+def _apply_limits(cpu_seconds, memory_mb):
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _failure_line(error, path):
+    lines = [frame.lineno for frame in traceback.extract_tb(error.__traceback__) if frame.filename == path]
+    if isinstance(error, SyntaxError) and error.filename == path:
+        lines.append(error.lineno)
+    return lines[-1] if lines else None
+
+# Generated files define process_prompt(prompt) as their entry point and
+# catch its exceptions into an "Error: ..." string, so send it one prompt and
+# treat that string as a failure
+def _call_entry_point(namespace):
+    process_prompt = namespace.get("process_prompt")
+    if not callable(process_prompt):
+        return {"status": "passed"}
+    answer = process_prompt(SMOKE_PROMPT)
+    if isinstance(answer, str) and answer.startswith("Error:"):
+        return {"status": "failed", "error": f"process_prompt returned {answer[:300]}"}
+    return {"status": "passed"}
+
+# Runs in the forked child: execute the file, report on `result_fd`, never return
+def _child(path, source, workdir, result_fd, output_fd, cpu_seconds, memory_mb):
+    result = {"status": "crashed", "error": "child exited before reporting"}
+    try:
+        os.setpgid(0, 0)
+        _apply_limits(cpu_seconds, memory_mb)
+        os.chdir(workdir)
+        stdin = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(stdin, 0)
+        os.dup2(output_fd, 1)
+        os.dup2(output_fd, 2)
+        sys.argv = [path]
+        namespace = {"__name__": "__main__", "__file__": path, "__builtins__": builtins}
+        try:
+            exec(compile(source, path, "exec"), namespace)
+            result = _call_entry_point(namespace)
+        except SystemExit as e:
+            result = {"status": "passed"} if e.code in (None, 0) else {"status": "failed", "error": f"SystemExit: {e.code}"}
+        except BaseException as e:
+            result = {"status": "failed", "error": f"{type(e).__name__}: {e}", "line": _failure_line(e, path)}
+        result["groq_calls"] = sys.modules["groq"].calls
+        result["agent_runs"] = sys.modules["swarms"].runs
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.write(result_fd, json.dumps(result, default=str).encode("utf-8"))
+        finally:
+            os._exit(0)
+
+# Read the child's report; None when it died or ran out of time first
+def _wait_for_report(pid, result_fd, timeout):
+    deadline = time.monotonic() + timeout
+    data = b""
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            os.killpg(pid, signal.SIGKILL)
+            return None, True
+        ready, _, _ = select.select([result_fd], [], [], remaining)
+        if ready:
+            chunk = os.read(result_fd, 65536)
+            if not chunk:
+                return (json.loads(data) if data else None), False
+            data += chunk
+
+def smoke_file(path, timeout=10, cpu_seconds=10, memory_mb=2048):
+    started = time.perf_counter()
+    path = os.path.abspath(path)
+    try:
+        source, extracted = load_source(path)
+    except (OSError, UnicodeDecodeError) as e:
+        return SmokeResult(path, "failed", 0.0, error=f"{type(e).__name__}: {e}")
+    result_read, result_write = os.pipe()
+    with tempfile.TemporaryFile() as output, tempfile.TemporaryDirectory(prefix="smoke-") as workdir:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            os.close(result_read)
+            _child(path, source, workdir, result_write, output.fileno(), cpu_seconds, memory_mb)
+        os.close(result_write)
+        try:
+            report, timed_out = _wait_for_report(pid, result_read, timeout)
+        finally:
+            os.close(result_read)
+            _, wait_status = os.waitpid(pid, 0)
+        output.seek(0)
+        tail = output.read()[-OUTPUT_TAIL:].decode("utf-8", errors="replace")
+    seconds = time.perf_counter() - started
+    if timed_out:
+        report = {"status": "timeout", "error": f"still running after {timeout:g} s"}
+    elif report is None:
+        report = {"status": "crashed", "error": _exit_reason(wait_status)}
+    return SmokeResult(path, seconds=seconds, extracted=extracted, output=tail, **report)
+
+def _exit_reason(wait_status):
+    if os.WIFSIGNALED(wait_status):
+        signum = os.WTERMSIG(wait_status)
+        if signum == signal.SIGXCPU:
+            return "CPU time limit exceeded"
+        return f"killed by {signal.Signals(signum).name}"
+    return f"exited with status {os.WEXITSTATUS(wait_status)} without reporting"
+
+# Smoke-test `paths` across `jobs` warm workers, yielding results as they finish
+def run(paths, jobs=None, timeout=10, cpu_seconds=10, memory_mb=2048):
+    jobs = jobs or os.cpu_count() or 1
+    # A spawned worker starts clean, so the stubs can't collide with a real
+    # groq or swarms the calling process already imported
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths)) or 1, mp_context=context, initializer=_warm_worker) as pool:
+        futures = [pool.submit(smoke_file, path, timeout, cpu_seconds, memory_mb) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+def expand(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths += sorted(glob.glob(os.path.join(pattern, "*.py")))
+        else:
+            paths += sorted(glob.glob(pattern)) or [pattern]
+    return list(dict.fromkeys(paths))
+
+def summarize(results, seconds):
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return {"files": len(results), "seconds": round(seconds, 3), **counts}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run generated swarm files against local groq/swarms/gradio stubs")
+    parser.add_argument("paths", nargs="*", default=["generated_code_*.py"], help="files, directories or glob patterns")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--timeout", type=float, default=10, help="wall-clock seconds allowed per file")
+    parser.add_argument("--cpu-seconds", type=int, default=10, help="CPU seconds allowed per file")
+    parser.add_argument("--memory-mb", type=int, default=2048, help="address space allowed per file")
+    parser.add_argument("--report", default=None, help="write a JSON report to this file")
+    args = parser.parse_args(argv)
+
+    paths = expand(args.paths)
+    if not paths:
+        parser.error("no files to run")
+    started = time.perf_counter()
+    results = []
+    for result in run(paths, jobs=args.jobs, timeout=args.timeout, cpu_seconds=args.cpu_seconds, memory_mb=args.memory_mb):
+        results.append(result)
+        where = f" (line {result.line})" if result.line else ""
+        print(f"{result.status:<8}{result.seconds:>7.2f}s  {os.path.relpath(result.file)}{where}  {result.error}".rstrip())
+    results.sort(key=lambda result: result.file)
+    summary = summarize(results, time.perf_counter() - started)
+    print(", ".join(f"{key} {value}" for key, value in summary.items()))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"summary": summary, "results": [result._asdict() for result in results]}, f, indent=2)
+    sys.exit(0 if summary.get("passed", 0) == len(results) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# Local stand-in for gradio, used by smoke_runner.py. Every component, layout
+# and launch() is a no-op object that accepts any arguments, so a generated
+# file can build and "launch" its UI without serving anything.
+
+launches = 0
+
+
+class _Stub:
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self, *args, **kwargs):
+        return _Stub(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Stub()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+    def launch(self, *args, **kwargs):
+        global launches
+        launches += 1
+        return self
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return _Stub()
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+# Local stand-in for the groq package, used by smoke_runner.py so generated
+# files can be executed without network access or an API key. Completions
+# echo the prompt back and are counted in `calls`.
+
+calls = 0
+
+
+class GroqError(Exception):
+    pass
+
+class APIError(GroqError):
+    pass
+
+class RateLimitError(APIError):
+    pass
+
+
+def _completion(messages, model, **kwargs):
+    global calls
+    calls += 1
+    prompt = messages[-1]["content"] if messages else ""
+    content = f"[stub {model}] {' '.join(str(prompt).split())[:200]}"
+    usage = SimpleNamespace(prompt_tokens=len(str(prompt)) // 4, completion_tokens=len(content) // 4)
+    usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+    message = SimpleNamespace(role="assistant", content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")], model=model, usage=usage)
+
+
+class _Completions:
+    def create(self, messages, model, **kwargs):
+        return _completion(messages, model, **kwargs)
+
+
+class Groq:
+    def __init__(self, api_key=None, **kwargs):
+        self.api_key = api_key
+        self.chat = SimpleNamespace(completions=_Completions())
+
+
+class _AsyncCompletions:
+    async def create(self, messages, model, **kwargs):
+        return _completion(messages, model, **kwargs)
+
+
+class AsyncGroq:
+    def __init__(self, api_key=None, **kwargs):
+        self.api_key = api_key
+        self.chat = SimpleNamespace(completions=_AsyncCompletions())
@@ -0,0 +1,93 @@
+from enum import Enum
+
+# GraphWorkflow, Node, NodeType and Edge with the checks of swarms 6.6.x
+# (duplicate nodes, edges between unknown nodes, missing entry or end
+# points), run in topological order without networkx.
+
+
+class NodeType(str, Enum):
+    AGENT = "agent"
+    TASK = "task"
+
+
+class Node:
+    def __init__(self, id, type, callable=None, agent=None):
+        if type == NodeType.TASK and callable is None:
+            raise ValueError("Task nodes must have a callable.")
+        self.id = id
+        self.type = type
+        self.callable = callable
+        self.agent = agent
+
+
+class Edge:
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+
+
+class GraphWorkflow:
+    def __init__(self, nodes=None, edges=None, entry_points=None, end_points=None, max_loops=1, **kwargs):
+        self.nodes = {}
+        self.edges = []
+        self.entry_points = list(entry_points or [])
+        self.end_points = list(end_points or [])
+        self.max_loops = max_loops
+        for node in (nodes or {}).values():
+            self.add_node(node)
+        for edge in edges or []:
+            self.add_edge(edge)
+
+    def add_node(self, node):
+        if node.id in self.nodes:
+            raise ValueError(f"Node with id {node.id} already exists.")
+        self.nodes[node.id] = node
+
+    def add_edge(self, edge):
+        if edge.source not in self.nodes or edge.target not in self.nodes:
+            raise ValueError("Both source and target nodes must exist before adding an edge.")
+        self.edges.append(edge)
+
+    def set_entry_points(self, entry_points):
+        for node_id in entry_points:
+            if node_id not in self.nodes:
+                raise ValueError(f"Node with id {node_id} does not exist.")
+        self.entry_points = entry_points
+
+    def set_end_points(self, end_points):
+        for node_id in end_points:
+            if node_id not in self.nodes:
+                raise ValueError(f"Node with id {node_id} does not exist.")
+        self.end_points = end_points
+
+    def _sorted_nodes(self):
+        incoming = {node_id: 0 for node_id in self.nodes}
+        for edge in self.edges:
+            incoming[edge.target] += 1
+        ready = [node_id for node_id, count in incoming.items() if count == 0]
+        ordered = []
+        while ready:
+            node_id = ready.pop(0)
+            ordered.append(node_id)
+            for edge in self.edges:
+                if edge.source == node_id:
+                    incoming[edge.target] -= 1
+                    if incoming[edge.target] == 0:
+                        ready.append(edge.target)
+        if len(ordered) != len(self.nodes):
+            raise ValueError("Graph contains a cycle")
+        return ordered
+
+    def run(self, task=None, *args, **kwargs):
+        if not self.entry_points:
+            raise ValueError("At least one entry point must be defined.")
+        if not self.end_points:
+            raise ValueError("At least one end point must be defined.")
+        results = {}
+        for node_id in self._sorted_nodes():
+            node = self.nodes[node_id]
+            if node.type == NodeType.TASK:
+                results[node_id] = node.callable()
+            else:
+                results[node_id] = node.agent.run(task, *args, **kwargs)
+        return results
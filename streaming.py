@@ -0,0 +1,78 @@
+import contextvars
+import time
+
+# Where a streaming model call writes its chunks as they arrive. A context
+# variable rather than a model attribute, so concurrent threads and asyncio
+# tasks sharing one model each stream into their own file.
+stream_sink = contextvars.ContextVar("stream_sink", default=None)
+
+
+# Watches a streamed completion and reports when the first ```python block
+# has closed, so the caller can stop generation instead of paying for the
+# prose that usually follows. Only the newest chunk plus a short tail of the
+# previous ones is scanned, so feeding is linear in the output size.
+class CodeFenceCutoff:
+    OPEN = "```python"
+    CLOSE = "\n```"
+
+    def __init__(self):
+        self.done = False
+        self._position = 0
+        self._code_start = None
+        self._tail = ""
+
+    # Returns the part of `chunk` to keep (everything up to and including the
+    # closing fence); empty once the block has closed
+    def feed(self, chunk):
+        if self.done:
+            return ""
+        window = self._tail + chunk
+        window_start = self._position - len(self._tail)
+        if self._code_start is None:
+            found = window.lower().find(self.OPEN)
+            if found != -1:
+                self._code_start = window_start + found + len(self.OPEN)
+        if self._code_start is not None:
+            found = window.find(self.CLOSE, max(0, self._code_start - window_start))
+            if found != -1:
+                self.done = True
+                chunk = chunk[:window_start + found + len(self.CLOSE) - self._position]
+        self._position += len(chunk)
+        self._tail = window[-(len(self.OPEN) - 1):]
+        return chunk
+
+
+# Accumulates a streamed completion: records time-to-first-token, forwards
+# text to the sink as it arrives and, when writing a code file, stops at the
+# end of the first code block
+class StreamCollector:
+    def __init__(self, started, sink=None):
+        self.started = started
+        self.sink = sink
+        self.cutoff = CodeFenceCutoff() if sink is not None else None
+        self.ttft = None
+        self.usage = None
+        self._parts = []
+
+    # Returns True once the caller should stop reading the stream
+    def add(self, chunk):
+        x_groq = getattr(chunk, "x_groq", None)
+        if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+            self.usage = x_groq.usage
+        if not chunk.choices:
+            return False
+        text = chunk.choices[0].delta.content
+        if not text:
+            return False
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+        if self.cutoff is not None:
+            text = self.cutoff.feed(text)
+        self._parts.append(text)
+        if self.sink is not None:
+            self.sink(text)
+        return self.cutoff is not None and self.cutoff.done
+
+    @property
+    def text(self):
+        return "".join(self._parts)
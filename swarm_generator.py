@@ -1,45 +1,467 @@
 import os
-import json
+import asyncio
+import itertools
+import collections
+import contextlib
+import contextvars
+import functools
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import NamedTuple
 from dotenv import load_dotenv
-from swarms import Agent, AgentRearrange, GraphWorkflow, Node, NodeType
-from groq import Groq
-import gradio as gr
 from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from rate_limiter import RateLimiter, estimate_tokens
+from response_cache import ResponseCache
+from streaming import StreamCollector, stream_sink
+from postprocess import validate_code
+from dedup_index import DedupIndex
+from run_journal import RunJournal
+from results_store import ResultsStore
+from search_index import SearchIndex
+from agent_memory import MemoryPolicy
+from cost_ledger import BudgetScheduler, CostLedger, load_prices
+from metrics import Registry
+import log_sink
+import transport
+from hedging import HedgePolicy, race, race_async
+from template_renderer import DESIGN_FIELDS_INSTRUCTIONS, render_design
+import design_schema
 
 # Load environment variables
 load_dotenv()
-api_key = os.getenv("GROQ_API_KEY")
-if not api_key:
-    raise ValueError("GROQ_API_KEY environment variable is not set.")
 
-# Initialize Groq client
-client = Groq(api_key=api_key)
+# groq, swarms and gradio take seconds to import, so nothing here imports
+# them at module level: the Groq clients and the swarms agents are built on
+# first use, and gradio is only imported by the UI.
+def require_api_key():
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable is not set.")
+    return api_key
+
+# Initialize Groq clients (the async one backs the pipelined mode)
+# over the process-wide connection pools in transport.py. The SDK's own
+# retries are off: they would resend 429s without going through the rate
+# limiter, so GroqModel's retry loop is the only one.
+@functools.lru_cache(maxsize=None)
+def groq_client():
+    from groq import Groq
+    return Groq(api_key=require_api_key(), http_client=transport.http_client(), max_retries=0)
+
+@functools.lru_cache(maxsize=None)
+def async_groq_client():
+    from groq import AsyncGroq
+    return AsyncGroq(api_key=require_api_key(), http_client=transport.async_http_client(), max_retries=0)
+
+# Shared limiter so every model instance, thread and task stays under the
+# provider's requests/min and tokens/min ceilings
+rate_limiter = RateLimiter(
+    requests_per_minute=int(os.getenv("GROQ_RPM", "30")),
+    tokens_per_minute=int(os.getenv("GROQ_TPM", "6000")),
+)
+
+# Models per stage. The organizational structure is a short, easy text task,
+# so by default it goes to a small instant model; the code stage uses the
+# large one. A design from the small model whose code fails validation is
+# redone once by ESCALATION_MODEL (see needs_escalation).
+DESIGNER_MODEL = os.getenv("DESIGNER_MODEL", "llama-3.1-8b-instant")
+CODE_MODEL = os.getenv("CODE_MODEL", "llama-3.3-70b-versatile")
+stage_models = {"design": DESIGNER_MODEL, "code": CODE_MODEL}
+escalation_model = CODE_MODEL if CODE_MODEL != DESIGNER_MODEL else None
+
+def configure_models(designer=None, code=None, escalate=True):
+    global escalation_model
+    stage_models["design"] = designer or stage_models["design"]
+    stage_models["code"] = code or stage_models["code"]
+    escalation_model = stage_models["code"] if escalate and stage_models["code"] != stage_models["design"] else None
+
+# Model used by calls made in the current context; set per stage, so the
+# swarms agents and the async pipeline route the same way
+model_choice = contextvars.ContextVar("model_choice", default=None)
+
+@contextlib.contextmanager
+def use_model(model_name):
+    token = model_choice.set(model_name)
+    try:
+        yield
+    finally:
+        model_choice.reset(token)
+
+# Response format for calls made in the current context, e.g. JSON mode for
+# design repairs
+response_format = contextvars.ContextVar("response_format", default=None)
+JSON_MODE = {"type": "json_object"}
+
+@contextlib.contextmanager
+def use_response_format(value):
+    token = response_format.set(value)
+    try:
+        yield
+    finally:
+        response_format.reset(token)
+
+# Tokens (and their cost) used by the calls made in a context, so they can be
+# charged to the item the calls were made for
+class Usage:
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+
+    def add(self, usage, cost=0.0):
+        self.prompt_tokens += usage.prompt_tokens
+        self.completion_tokens += usage.completion_tokens
+        self.cost += cost
+
+    @property
+    def totals(self):
+        return self.prompt_tokens, self.completion_tokens, self.cost
+
+call_usage = contextvars.ContextVar("call_usage", default=None)
+
+@contextlib.contextmanager
+def track_usage(usage=None):
+    usage = usage if usage is not None else Usage()
+    token = call_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        call_usage.reset(token)
+
+# Pipeline metrics, exported with --metrics-port and --metrics-summary
+registry = Registry()
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+request_seconds = registry.histogram("groq_request_seconds", "Latency of Groq chat completion calls", ["model"])
+ttft_seconds = registry.histogram("groq_time_to_first_token_seconds", "Time to first token of streamed completions", ["model"])
+rate_limit_wait_seconds = registry.histogram("groq_rate_limit_wait_seconds", "Time spent waiting on the local rate limiter")
+prompt_tokens_per_call = registry.histogram("groq_prompt_tokens_per_call", "Prompt tokens of each call, to catch prompts that grow over a long run", ["model"], buckets=TOKEN_BUCKETS)
+prompt_tokens = registry.counter("groq_prompt_tokens_total", "Prompt tokens reported by the API", ["model"])
+completion_tokens = registry.counter("groq_completion_tokens_total", "Completion tokens reported by the API", ["model"])
+cost_usd = registry.counter("groq_cost_usd_total", "Cost of API calls in USD, from the ledger's price table", ["model"])
+api_errors = registry.counter("groq_errors_total", "Model calls that failed, by error class", ["error"])
+retries = registry.counter("groq_retries_total", "Model calls retried after a 429")
+cache_hits = registry.counter("groq_cache_hits_total", "Responses served from the response cache")
+hedged_requests = registry.counter("groq_hedged_requests_total", "Duplicate requests sent for slow calls, by whether the duplicate answered first", ["outcome"])
+stage_seconds = registry.histogram("swarm_stage_seconds", "Duration of each pipeline stage", ["stage"])
+files_written = registry.counter("swarm_files_written_total", "Generated files that passed validation and were written")
+duplicate_results = registry.counter("swarm_duplicate_results_total", "Results identical to one already in the results store")
+validation_failures = registry.counter("swarm_validation_failures_total", "Generated code that failed validation")
+# Quality side of the per-model tradeoff: whether the first code generated for
+# a design passed validation, by the model that made the design
+design_outcomes = registry.counter("swarm_design_outcomes_total", "First validation result of each design, by designer model", ["model", "outcome"])
+code_sources = registry.counter("swarm_code_sources_total", "Code stage results, by whether a template, an earlier file or the code generator produced them", ["source"])
+design_repairs = registry.counter("swarm_design_repairs_total", "Designs whose structured fields failed the schema, by whether a repair request fixed them", ["outcome"])
+budget_throttles = registry.counter("swarm_budget_throttles_total", "Times the budget scheduler slowed, paused or stopped the run", ["action"])
+budget_downgrades = registry.counter("swarm_budget_downgrades_total", "Cheaper paths taken because the budget was tight", ["path"])
+escalations = registry.counter("swarm_design_escalations_total", "Designs redone by the escalation model after their code failed validation")
+queue_depth = registry.gauge("swarm_queue_depth", "Items waiting in each pipeline queue", ["queue"])
+pool_connections = registry.gauge("groq_pool_connections", "Connections in the shared HTTP pools, by state", ["state"])
+pool_requests = registry.gauge("groq_pool_requests", "Requests in flight or waiting for a pooled connection")
+connections_opened = registry.gauge("groq_connections_opened", "Connections opened by the shared HTTP pools since start")
+for state in ("active", "idle"):
+    pool_connections.set_function(lambda state=state: transport.pool_stats()[state], state=state)
+pool_requests.set_function(lambda: transport.pool_stats()["requests"])
+connections_opened.set_function(lambda: transport.pool_stats()["opened"])
 
 # Define the Groq-based model
 class GroqModel:
-    def __init__(self, client):
-        self.client = client
+    def __init__(self, client=None, limiter=None, max_tokens=None, max_retries=3, cache=None, stream=False, model_name=CODE_MODEL, hedge=None):
+        self._client = client
+        self.model_name = model_name
+        self.hedge = hedge
+        self._hedge_executor = None
+        self.limiter = limiter
+        self.cache = cache
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.stream = stream
+
+    # The shared client, built on first use unless one was passed in
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.default_client()
+        return self._client
+
+    def default_client(self):
+        return groq_client()
+
+    def _messages(self, prompt):
+        return [
+            {"role": "system", "content": "You are a Python code expert."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _request(self, messages):
+        request = {"messages": messages, "model": model_choice.get() or self.model_name}
+        if self.max_tokens:
+            request["max_tokens"] = self.max_tokens
+        if response_format.get() is not None:
+            request["response_format"] = response_format.get()
+        return request
+
+    def _cost(self, messages):
+        return self.limiter.request_cost(messages, self.max_tokens) if self.limiter else 0
+
+    # Serve a cached response, passing it to the stream sink like a live one
+    def _cached(self, key):
+        cached = self.cache.lookup(key) if key is not None else None
+        if cached is None:
+            return None
+        cache_hits.inc()
+        sink = stream_sink.get()
+        if sink is not None:
+            sink(cached)
+        return cached
+
+    # A 429 resyncs the limiter from its headers; retry while the budget lasts
+    def _rate_limited(self, error, attempt):
+        if self.limiter is None or attempt >= self.max_retries:
+            raise error
+        self.limiter.update_from_headers(error.response.headers)
+        retries.inc()
+
+    # Tokens a call used, charged to the metrics, the ledger and the item
+    def _record_usage(self, request, usage):
+        if usage is None:
+            return
+        prompt_tokens.inc(usage.prompt_tokens, model=request["model"])
+        prompt_tokens_per_call.observe(usage.prompt_tokens, model=request["model"])
+        completion_tokens.inc(usage.completion_tokens, model=request["model"])
+        usd = ledger.record_call(request["model"], current_stage.get(), usage.prompt_tokens, usage.completion_tokens)
+        cost_usd.inc(usd, model=request["model"])
+        if call_usage.get() is not None:
+            call_usage.get().add(usage, usd)
+
+    def _finish(self, content, headers, cost, request, usage, started):
+        request_seconds.observe(time.perf_counter() - started, model=request["model"])
+        self._record_usage(request, usage)
+        if self.limiter:
+            self.limiter.update_from_headers(headers)
+            self.limiter.refund(cost, usage.total_tokens if usage is not None else None)
+        return content
+
+    def _stored(self, key, content):
+        if key is not None:
+            self.cache.store(key, content)
+        return content
+
+    def _complete(self, raw, response, cost, request, started):
+        content = response.choices[0].message.content
+        return self._finish(content, raw.headers, cost, request, getattr(response, "usage", None), started)
+
+    def _streamed(self, raw, collector, cost, request):
+        if collector.ttft is not None:
+            ttft_seconds.observe(collector.ttft, model=request["model"])
+            record_timing("ttft", collector.ttft)
+        return self._finish(collector.text, raw.headers, cost, request, collector.usage, collector.started)
+
+    # A hedge is only sent when the budget allows and the limiter has room now
+    def _can_hedge(self, cost):
+        return self.hedge.try_hedge(lambda: self.limiter is None or self.limiter.try_acquire(cost))
+
+    # Send one API call, hedged when a policy is set. The hedge threshold is
+    # tracked per model and mode; a streamed call counts as answered at its
+    # first token.
+    def _send(self, call, request, cost):
+        if self.hedge is None:
+            return call()
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+        key = (request["model"], self.stream)
+        started = time.perf_counter()
+        # The loser may finish on a pool thread, so it is accounted for in
+        # this call's context (stage and item usage)
+        context = contextvars.copy_context()
+        discard = lambda result: context.run(self._discard, result, request, cost)
+        result, outcome = race(self._hedge_executor, call, self.hedge.delay(key), lambda: self._can_hedge(cost), discard)
+        self._hedged(key, outcome, started)
+        return result
+
+    def _hedged(self, key, outcome, started):
+        self.hedge.record(key, time.perf_counter() - started)
+        if outcome is not None:
+            hedged_requests.inc(outcome=outcome)
+
+    # The losing side of a hedged call still spent tokens, and a streaming
+    # one still holds its connection
+    def _discard(self, result, request, cost):
+        if self.stream:
+            result[1].close()
+        self._discarded(result, request, cost)
+
+    # Charge a losing call's tokens like a winner's and hand back the unused
+    # part of its reservation. A closed stream reports no usage, so it is
+    # charged its prompt and the chunks it had read.
+    def _discarded(self, result, request, cost):
+        if self.stream:
+            usage = self._estimated_usage(request, len(result[2]))
+        else:
+            usage = getattr(result[1], "usage", None)
+        self._record_usage(request, usage)
+        if self.limiter:
+            self.limiter.refund(cost, usage.total_tokens if usage is not None else None)
+
+    # A losing call cancelled before it answered: charged its prompt, and
+    # the rest of its reservation handed back
+    def _cancelled(self, request, cost):
+        usage = self._estimated_usage(request, 0)
+        self._record_usage(request, usage)
+        if self.limiter:
+            self.limiter.refund(cost, usage.total_tokens)
+
+    def _estimated_usage(self, request, completion_tokens):
+        prompt = estimate_tokens(request["messages"])
+        return SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion_tokens, total_tokens=prompt + completion_tokens)
+
+    def _create(self, request):
+        raw = self.client.chat.completions.with_raw_response.create(**request)
+        return raw, raw.parse()
+
+    # Open a stream and read up to its first content chunk
+    def _open_stream(self, request):
+        raw = self.client.chat.completions.with_raw_response.create(**request, stream=True)
+        stream = raw.parse()
+        chunks = []
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    break
+        except BaseException:
+            stream.close()
+            raise
+        return raw, stream, chunks
+
+    def _call_stream(self, request, cost):
+        started = time.perf_counter()
+        raw, stream, chunks = self._send(lambda: self._open_stream(request), request, cost)
+        collector = StreamCollector(started, stream_sink.get())
+        try:
+            for chunk in itertools.chain(chunks, stream):
+                if collector.add(chunk):
+                    break
+        finally:
+            stream.close()
+        return self._streamed(raw, collector, cost, request)
 
     def __call__(self, prompt):
+        from groq import RateLimitError
+        messages = self._messages(prompt)
+        request = self._request(messages)
+        # Taken before anything can fail, so each call keeps its place in the run
+        cache_key = self.cache.key(request) if self.cache else None
         try:
-            response = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a Python code expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama-3.3-70b-versatile",
-            )
-            return response.choices[0].message.content
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
+            for attempt in itertools.count():
+                cost = self._cost(messages)
+                if self.limiter:
+                    rate_limit_wait_seconds.observe(self.limiter.acquire(cost))
+                try:
+                    if self.stream:
+                        return self._stored(cache_key, self._call_stream(request, cost))
+                    started = time.perf_counter()
+                    raw, response = self._send(lambda: self._create(request), request, cost)
+                except RateLimitError as e:
+                    self._rate_limited(e, attempt)
+                    continue
+                return self._stored(cache_key, self._complete(raw, response, cost, request, started))
         except Exception as e:
+            api_errors.inc(error=type(e).__name__)
             return f"Error: {e}"
 
-# Initialize the model
-model = GroqModel(client=client)
+# Async variant of the Groq-based model for the pipelined main loop
+class AsyncGroqModel(GroqModel):
+    def default_client(self):
+        return async_groq_client()
+
+    async def _send(self, call, request, cost):
+        if self.hedge is None:
+            return await call()
+        key = (request["model"], self.stream)
+        started = time.perf_counter()
+        result, outcome = await race_async(call, self.hedge.delay(key), lambda: self._can_hedge(cost),
+                                           lambda result: self._discard(result, request, cost),
+                                           lambda: self._cancelled(request, cost))
+        self._hedged(key, outcome, started)
+        return result
+
+    async def _discard(self, result, request, cost):
+        if self.stream:
+            await result[1].close()
+        self._discarded(result, request, cost)
+
+    async def _create(self, request):
+        raw = await self.client.chat.completions.with_raw_response.create(**request)
+        return raw, await raw.parse()
+
+    async def _open_stream(self, request):
+        raw = await self.client.chat.completions.with_raw_response.create(**request, stream=True)
+        stream = await raw.parse()
+        chunks = []
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    break
+        except BaseException:
+            await stream.close()
+            raise
+        return raw, stream, chunks
 
-# Define agents with updated system prompts
-organizational_designer = Agent(
-    agent_name="Organizational Designer",
-    system_prompt="""
+    async def _call_stream(self, request, cost):
+        started = time.perf_counter()
+        raw, stream, chunks = await self._send(lambda: self._open_stream(request), request, cost)
+        collector = StreamCollector(started, stream_sink.get())
+        try:
+            for chunk in chunks:
+                if collector.add(chunk):
+                    break
+            else:
+                async for chunk in stream:
+                    if collector.add(chunk):
+                        break
+        finally:
+            await stream.close()
+        return self._streamed(raw, collector, cost, request)
+
+    async def __call__(self, prompt):
+        from groq import RateLimitError
+        messages = self._messages(prompt)
+        request = self._request(messages)
+        # Taken before anything can fail, so each call keeps its place in the run
+        cache_key = self.cache.key(request) if self.cache else None
+        try:
+            cached = self._cached(cache_key)
+            if cached is not None:
+                return cached
+            for attempt in itertools.count():
+                cost = self._cost(messages)
+                if self.limiter:
+                    rate_limit_wait_seconds.observe(await self.limiter.acquire_async(cost))
+                try:
+                    if self.stream:
+                        return self._stored(cache_key, await self._call_stream(request, cost))
+                    started = time.perf_counter()
+                    raw, response = await self._send(lambda: self._create(request), request, cost)
+                except RateLimitError as e:
+                    self._rate_limited(e, attempt)
+                    continue
+                return self._stored(cache_key, self._complete(raw, response, cost, request, started))
+        except Exception as e:
+            api_errors.inc(error=type(e).__name__)
+            return f"Error: {e}"
+
+# Initialize the models
+model = GroqModel(limiter=rate_limiter)
+async_model = AsyncGroqModel(limiter=rate_limiter)
+
+# System prompts of the two agents
+ORGANIZATIONAL_DESIGNER_PROMPT = """
     You are an expert in creating organizational structures. Choose one tuple from the following list of organizations, missions, agents, use cases, and create a new configuration with a novel organization, mission, agent, use case different from one of the following, and then choose an appropriate swarm architecture:
 
     - Organization: Customer Service
@@ -77,56 +499,17 @@ organizational_designer = Agent(
       Agent: Ad Campaign Agent
       Use Case: Campaign analysis
       Swarm Architecture: Spreadsheet
-    """,
-    llm=model,
-    max_loops=1,
-)
-
-swarm_code_generator = Agent(
-    agent_name="Swarm Code Generator",
-    system_prompt="""
-start wwith this boilerplate
-import os
-import json
-from dotenv import load_dotenv
-from swarms import Agent, AgentRearrange, GraphWorkflow, Node, NodeType
-from groq import Groq
-import gradio as gr
-from datetime import datetime
-
-# Load environment variables
-load_dotenv()
-api_key = os.getenv("GROQ_API_KEY")
-if not api_key:
-    raise ValueError("GROQ_API_KEY environment variable is not set.")
-
-# Initialize Groq client
-client = Groq(api_key=api_key)
-
-# Define the Groq-based model
-class GroqModel:
-    def __init__(self, client):
-        self.client = client
-
-    def __call__(self, prompt):
-        try:
-            response = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are a Python code expert."},
-                    {"role": "user", "content": prompt}
-                ],
-                model="llama-3.3-70b-versatile",
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error: {e}"
-
-# Initialize the model
-model = GroqModel(client=client)
-then,
+    """ + DESIGN_FIELDS_INSTRUCTIONS
 
+SWARM_CODE_GENERATOR_PROMPT = """
+The generated file already starts with a fixed boilerplate that is added automatically. It provides:
+- imports: os, json, load_dotenv, Agent, AgentRearrange, GraphWorkflow, Node, NodeType, Groq, gradio as gr, datetime
+- environment loading and the GROQ_API_KEY check
+- client = Groq(api_key=api_key)
+- class GroqModel and model = GroqModel(client=client); pass llm=model to every Agent
+Do not repeat any of it. Reply with a single ```python block containing only the code that comes after the boilerplate.
 
- generate Python code to implement the swarm ai agent architecture for the organization:
+Generate Python code to implement the swarm ai agent architecture for the organization:
 
     Swarm Architecture Templates:
 
@@ -221,62 +604,705 @@ def process_prompt(prompt):
 
     return chat_history, share_flag
       
-    """,
-    llm=model,
-    max_loops=1,
-)
+    """
 
-# Define agent flow for the system
-agents = [organizational_designer, swarm_code_generator]
-flow = f"{organizational_designer.agent_name} -> {swarm_code_generator.agent_name}"
 
-# Define the swarm system
-swarm_system = AgentRearrange(
-    name="SwarmCodeGenerationSystem",
-    description="Swarm system for generating and refining Python programs for organizational structures and swarms",
-    agents=agents,
-    flow=flow,
-    max_loops=1,
-    output_type="all",
-)
+# What the swarms agents remember between main_loop iterations (see
+# agent_memory.py); --agent-memory and --memory-tokens
+memory_policy = MemoryPolicy()
+
+def configure_memory(mode="reset", max_tokens=4000):
+    global memory_policy
+    memory_policy = MemoryPolicy(mode, max_tokens)
+
+# Call one of the agents with its memory trimmed by the policy first
+def run_agent(agent, task):
+    memory_policy.apply(agent)
+    return agent(task)
+
+
+class Agents(NamedTuple):
+    organizational_designer: object
+    swarm_code_generator: object
+    swarm_system: object
+
+
+# Define agents with updated system prompts. Built on first use: importing
+# swarms is the slowest part of startup, and the async pipeline calls the
+# model with the prompts above directly, never needing swarms at all.
+@functools.lru_cache(maxsize=None)
+def build_agents():
+    # Route swarms' per-run log files into one rotated file; must precede the swarms import
+    log_sink.install()
+    from swarms import Agent, AgentRearrange
+
+    organizational_designer = Agent(
+        agent_name="Organizational Designer",
+        system_prompt=ORGANIZATIONAL_DESIGNER_PROMPT,
+        llm=model,
+        max_loops=1,
+    )
+    swarm_code_generator = Agent(
+        agent_name="Swarm Code Generator",
+        system_prompt=SWARM_CODE_GENERATOR_PROMPT,
+        llm=model,
+        max_loops=1,
+    )
+
+    # Define agent flow for the system
+    agents = [organizational_designer, swarm_code_generator]
+    flow = f"{organizational_designer.agent_name} -> {swarm_code_generator.agent_name}"
+
+    # Define the swarm system
+    swarm_system = AgentRearrange(
+        name="SwarmCodeGenerationSystem",
+        description="Swarm system for generating and refining Python programs for organizational structures and swarms",
+        agents=agents,
+        flow=flow,
+        max_loops=1,
+        # Only the generated code; "all" joined every agent's output into the result
+        output_type="final",
+    )
+    for agent in agents:
+        memory_policy.attach(agent)
+    return Agents(organizational_designer, swarm_code_generator, swarm_system)
+
+# Keep module.organizational_designer, module.client etc. working for callers
+_LAZY_ATTRIBUTES = {
+    "organizational_designer": lambda: build_agents().organizational_designer,
+    "swarm_code_generator": lambda: build_agents().swarm_code_generator,
+    "swarm_system": lambda: build_agents().swarm_system,
+    "client": groq_client,
+    "async_client": async_groq_client,
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+DESIGN_TASK = "Generate an organizational structure for a new project."
+
+# How many times a design that is a near-duplicate of an earlier one is
+# requested again, with its nearest neighbours excluded, before it is skipped
+MAX_REDESIGNS = 2
+
+# How many times an item whose code fails validation is sent back to the
+# code generator before it is dropped
+MAX_REGENERATIONS = 2
+
+# Callbacks notified with (name, seconds) for each pipeline stage and for
+# time-to-first-token on streamed calls
+stage_listeners = []
+
+def record_timing(name, seconds):
+    for listener in stage_listeners:
+        listener(name, seconds)
+
+# Time to first token is observed per model where it is measured
+def observe_stage(name, seconds):
+    if name != "ttft":
+        stage_seconds.observe(seconds, stage=name)
+
+stage_listeners.append(observe_stage)
+
+# Stage the calls made in the current context belong to, for the cost ledger
+current_stage = contextvars.ContextVar("current_stage", default=None)
+
+@contextlib.contextmanager
+def timed_stage(stage):
+    start = time.perf_counter()
+    token = current_stage.set(stage)
+    try:
+        yield
+    finally:
+        current_stage.reset(token)
+        record_timing(stage, time.perf_counter() - start)
+
+# Tokens and cost of every call, in memory unless a ledger file is enabled
+# (see cost_ledger.py)
+ledger = CostLedger()
+
+def enable_ledger(path="cost_ledger.jsonl", prices_path=None):
+    global ledger
+    ledger = CostLedger(path, prices=load_prices(prices_path) if prices_path else None)
+
+# Hourly/daily budget over the ledger. While it is tight, code goes to the
+# designer's smaller model, failed designs aren't escalated to the large one
+# and close enough earlier files are reused more readily; near the limit the
+# loops slow down, and past it they wait for the window or stop.
+budget = None
+# Reuse threshold while the budget is tight, when a search index is enabled
+TIGHT_REUSE_THRESHOLD = 0.4
+
+def enable_budget(**limits):
+    global budget
+    budget = BudgetScheduler(ledger, on_throttle=lambda action, seconds: budget_throttles.inc(action=action), **limits)
+
+def budget_tight():
+    return budget is not None and budget.tight()
+
+# Code stage model: the designer's smaller model while the budget is tight
+def budget_code_model():
+    if stage_models["code"] != stage_models["design"] and budget_tight():
+        budget_downgrades.inc(path="small_model")
+        return stage_models["design"]
+    return stage_models["code"]
+
+# Attach the on-disk response cache to both models
+def enable_cache(mode, path="groq_cache.sqlite", ttl=None, max_mb=256):
+    model.cache = async_model.cache = ResponseCache(
+        path=path,
+        mode=mode,
+        max_bytes=int(max_mb * 1024 * 1024),
+        ttl=ttl,
+    )
+
+# Hedge slow calls on both models with one shared policy and budget
+def enable_hedging(percentile=95, budget=0.05):
+    model.hedge = async_model.hedge = HedgePolicy(percentile=percentile, budget=budget)
+
+# Near-duplicate index over designs already sent to the code generator, so a
+# repeated organization doesn't pay for another code generation call
+design_index = None
+
+def enable_dedup(path="design_index.bin", threshold=0.5):
+    global design_index
+    design_index = DedupIndex(path=path, threshold=threshold)
+
+def design_task(excluded):
+    if not excluded:
+        return DESIGN_TASK
+    names = "; ".join(excluded)
+    return f"{DESIGN_TASK} It must not resemble any of these organizations, which have already been generated: {names}."
+
+# Record a new design in the index; a near-duplicate is not recorded and its
+# neighbour is added to `excluded` for the next request
+def is_duplicate(org_structure, excluded):
+    if design_index is None or org_structure.startswith("Error:"):
+        return False
+    match = design_index.check_and_add(org_structure)
+    if match is None:
+        return False
+    print(f"Organizational structure is a near-duplicate of {match.label} ({match.similarity:.0%} similar)")
+    excluded.append(match.label)
+    return True
+
+# Schema check of a design's structured fields. When some are missing or
+# invalid, one small JSON-mode request asks for just those and the answer is
+# merged back in; when that doesn't fix them the design is kept as it is, and
+# its code comes from the code generator instead of a template.
+def needs_repair(org_structure):
+    if org_structure.startswith("Error:"):
+        return None
+    fields, errors = design_schema.check(org_structure)
+    return (fields, errors) if errors else None
+
+def repaired(org_structure, fields, errors, answer):
+    if not answer.startswith("Error:"):
+        fields = design_schema.apply_repair(fields, errors, answer)
+        if fields is not None:
+            design_repairs.inc(outcome="repaired")
+            return design_schema.with_fields(org_structure, fields)
+    design_repairs.inc(outcome="failed")
+    print(f"Could not repair the design's structured fields: {design_schema.describe(errors, '; ')}")
+    return org_structure
+
+def repair_design(org_structure, model_name):
+    problems = needs_repair(org_structure)
+    if problems is None:
+        return org_structure
+    with timed_stage("repair"), use_model(model_name), use_response_format(JSON_MODE):
+        answer = model(design_schema.repair_task(org_structure, problems[1]))
+    return repaired(org_structure, *problems, answer)
+
+# Stage 1 with duplicate avoidance; None when every attempt was a near-duplicate
+def design_structure(model_name=None):
+    model_name = model_name or stage_models["design"]
+    excluded = []
+    for _ in range(MAX_REDESIGNS + 1):
+        with timed_stage("design"), use_model(model_name):
+            org_structure = run_agent(build_agents().organizational_designer, design_task(excluded))
+        if not is_duplicate(org_structure, excluded):
+            return repair_design(org_structure, model_name)
+    print("Skipping code generation for a repeated organizational structure")
+    return None
+
+# Stage of every item in flight. In memory only unless a journal file is
+# enabled, in which case a killed run can be resumed without repeating the
+# API calls it already paid for.
+journal = RunJournal()
+
+def enable_journal(path="run_journal.json", resume=False):
+    global journal
+    journal = RunJournal(path=path, resume=resume)
+
+# Whether an item whose code just failed validation should get a new design
+# from the escalation model instead of another try at the same design
+def needs_escalation(item_id):
+    design_model = journal.design_model(item_id)
+    if escalation_model is None or design_model is None or design_model == escalation_model:
+        return False
+    if budget_tight():
+        budget_downgrades.inc(path="no_escalation")
+        return False
+    return True
+
+def escalated(item_id, org_structure, usage=None):
+    if org_structure is None or org_structure.startswith("Error:"):
+        print(f"Escalated redesign failed: {org_structure}")
+        journal.charge(item_id, usage)
+        drop_item(item_id)
+        return None
+    escalations.inc()
+    print(f"Redesigned with {escalation_model}: {org_structure}")
+    journal.redesigned(item_id, org_structure, escalation_model, usage)
+    return org_structure
+
+# Content-addressed store for finished files (see results_store.py); when
+# it is off they are written to the working directory as before
+results_store = None
+
+def enable_results_store(root="results_store", compression=None):
+    global results_store
+    results_store = ResultsStore(root, **({"compression": compression} if compression else {}))
+
+# What the results store records about an item besides its code
+def result_metadata(item_id):
+    item = journal.item(item_id)
+    organization, architecture = design_schema.design_labels(item.get("org_structure") or "")
+    return {
+        "organization": organization,
+        "architecture": architecture,
+        "design_model": item.get("design_model"),
+        "code_model": item.get("code_model"),
+        "prompt_tokens": item.get("prompt_tokens"),
+        "completion_tokens": item.get("completion_tokens"),
+    }
+
+# Record what an item cost in the ledger once it is finished: written to
+# `path`, or given up on when path is None
+def charge_item(item_id, path=None):
+    item = journal.item(item_id)
+    usage = (item.get("prompt_tokens", 0), item.get("completion_tokens", 0), item.get("cost", 0.0))
+    ledger.record_item(path, usage, item.get("design_model"), item.get("code_model"))
+
+def drop_item(item_id):
+    charge_item(item_id)
+    journal.drop(item_id)
+
+# Give up on an item that has used its regenerations. A resumed item can
+# already be past a lower --max-regenerations than the one it started with.
+def drop_exhausted(item_id):
+    drop_item(item_id)
+    print("Regeneration budget exhausted, dropping this organizational structure")
+
+# Link a finished file into place under a timestamped name, without
+# clobbering a file written in the same second by another iteration
+def publish_generated_code(part_path):
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    for n in itertools.count():
+        file_name = f"generated_code_{stamp}.py" if n == 0 else f"generated_code_{stamp}_{n}.py"
+        try:
+            os.link(part_path, file_name)
+        except FileExistsError:
+            continue
+        os.unlink(part_path)
+        return file_name
+
+# Mode a plain open() would create files with; mkstemp's are 0600. Read once,
+# since reading the umask means setting it.
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+# Output file for one code generation call. While active it is the stream
+# sink, so streamed chunks land on disk as they arrive; once the code has
+# passed validation the file is rewritten with the final spliced code and
+# only then published under its final name.
+class GeneratedCodeFile:
+    def __init__(self):
+        fd, self.part_path = tempfile.mkstemp(prefix=".generated_code_", suffix=".py.part", dir=".")
+        os.fchmod(fd, FILE_MODE)
+        self.file = os.fdopen(fd, "w", buffering=1)
+
+    def write(self, text):
+        self.file.write(text)
+
+    def __enter__(self):
+        self._token = stream_sink.set(self.write)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        stream_sink.reset(self._token)
+        if exc_type is not None:
+            self.discard()
+
+    def publish(self, code, **metadata):
+        if results_store is not None:
+            self.discard()
+            stored = results_store.put(code, **metadata)
+            if not stored.new:
+                duplicate_results.inc()
+            return stored.path
+        self.file.seek(0)
+        self.file.truncate()
+        self.file.write(code)
+        self.file.close()
+        return publish_generated_code(self.part_path)
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.part_path):
+            os.unlink(self.part_path)
+
+# Known architectures are rendered from templates instead of calling the code
+# generator; off with --no-templates
+use_templates = True
+
+# Stage 2 fast path: the file body for a design with structured fields and a
+# templated architecture, or None when the code generator is needed. Only
+# first attempts are rendered; code that failed validation goes to the model
+# with its errors.
+def rendered_code(org_structure, errors):
+    if not use_templates or errors or org_structure.startswith("Error:"):
+        return None
+    with timed_stage("render"):
+        swarm_code = render_design(org_structure)
+    if swarm_code is not None:
+        code_sources.inc(source="template")
+        print("Rendered swarm code from a template")
+    return swarm_code
+
+# Full-text index over finished files (see search_index.py). Every file that
+# passes validation is indexed with its design; with a reuse threshold, a
+# new design whose closest indexed design is at least that similar is served
+# the earlier file instead of a code generator call.
+search_index = None
+reuse_threshold = None
+
+def enable_search(path="search_index.sqlite", reuse=None):
+    global search_index, reuse_threshold
+    search_index = SearchIndex(path)
+    reuse_threshold = reuse
+
+def index_result(org_structure, code, path):
+    organization, architecture = design_schema.design_labels(org_structure)
+    search_index.add(code, organization, architecture, description=org_structure, path=path)
+
+# Stage 2 from the search index: the code of a close enough earlier design,
+# or None. Like templates, only first attempts are served.
+def reused_code(org_structure, errors):
+    threshold = reuse_threshold
+    if search_index is not None and budget_tight():
+        threshold = min(threshold or 1, TIGHT_REUSE_THRESHOLD)
+    if search_index is None or threshold is None or errors or org_structure.startswith("Error:"):
+        return None
+    with timed_stage("search"):
+        match = search_index.closest(org_structure, threshold)
+    if match is None:
+        return None
+    if reuse_threshold is None or match.score < reuse_threshold:
+        budget_downgrades.inc(path="reuse")
+    code_sources.inc(source="reuse")
+    print(f"Reusing {match.path or match.key[:12]} ({match.score:.0%} similar design)")
+    return search_index.get_code(match.key)
+
+# Stage 2 without the code generator: (code, source), where source is the
+# code model recorded in the journal, or (None, None)
+def local_code(org_structure, errors):
+    swarm_code = rendered_code(org_structure, errors)
+    if swarm_code is not None:
+        return swarm_code, "template"
+    swarm_code = reused_code(org_structure, errors)
+    if swarm_code is not None:
+        return swarm_code, "reuse"
+    return None, None
+
+# Code-stage task; a regeneration names the problems validation found so the
+# model fixes them rather than starting over blind
+def code_task(org_structure, errors=None):
+    if not errors:
+        return org_structure
+    problems = "\n".join(f"- {error}" for error in errors)
+    return f"{org_structure}\n\nA previous attempt at this code failed validation:\n{problems}\nGenerate the code again with these problems fixed."
+
+# Validation runs in a process pool across all cores, off the generation loop
+validation_pool = None
+
+def submit_validation(swarm_code):
+    global validation_pool
+    if validation_pool is None:
+        validation_pool = ProcessPoolExecutor()
+    started = time.perf_counter()
+    future = validation_pool.submit(validate_code, swarm_code)
+    future.add_done_callback(lambda _: record_timing("validate", time.perf_counter() - started))
+    return future
+
+# Stop the validation workers, waiting for them to exit
+def shutdown_validation():
+    global validation_pool
+    if validation_pool is not None:
+        validation_pool.shutdown()
+        validation_pool = None
+
+# Publish code that passed validation; otherwise discard it and return the
+# errors when the item still has regeneration budget left
+def handle_validation(validation, code_file, item_id, attempt, max_regenerations):
+    if attempt == 0:
+        design_model = journal.design_model(item_id) or "unknown"
+        design_outcomes.inc(model=design_model, outcome="valid" if validation.ok else "invalid")
+    journal.validated(item_id, validation)
+    metadata = result_metadata(item_id) if results_store is not None else {}
+    if validation.ok:
+        with timed_stage("write"):
+            file_name = code_file.publish(validation.code, **metadata)
+        if search_index is not None:
+            index_result(journal.item(item_id).get("org_structure") or "", validation.code, file_name)
+        charge_item(item_id, file_name)
+        journal.written(item_id)
+        files_written.inc()
+        print(f"Generated code saved to {file_name}")
+        return None
+    validation_failures.inc()
+    code_file.discard()
+    if results_store is not None and validation.code:
+        # Kept so failures can be queried next to the files that passed
+        results_store.put(validation.code, valid=False, errors=validation.errors, **metadata)
+    print(f"Generated code failed validation: {'; '.join(validation.errors)}")
+    if attempt >= max_regenerations:
+        drop_exhausted(item_id)
+        return None
+    return validation.errors
+
+# Designs still to request; on a resumed run the ones already made count
+def design_claims(iterations):
+    if iterations is None:
+        return itertools.count()
+    return iter(range(max(0, iterations - journal.resumed_designs)))
 
 # Main loop to continuously run the system
-# Main loop to continuously run the system
-def main_loop():
+def main_loop(iterations=None, max_regenerations=MAX_REGENERATIONS):
+    designs = design_claims(iterations)
+    validations = []  # (future, code_file, item_id, org_structure, attempt) still being validated
+    regenerations = collections.deque()  # (item_id, org_structure, errors, attempt) waiting for another try
+    # Pick up whatever a previous run left unfinished, from its last stage
+    for item_id, org_structure, errors, attempt, swarm_code in journal.unfinished():
+        if swarm_code is None and attempt > max_regenerations:
+            drop_exhausted(item_id)
+        elif swarm_code is None:
+            regenerations.append((item_id, org_structure, errors, attempt))
+        else:
+            validations.append((submit_validation(swarm_code), GeneratedCodeFile(), item_id, org_structure, attempt))
+    stopped = False
     while True:
         try:
-            # Step 1: Generate organizational structure using Agent 1
-            org_structure = organizational_designer("Generate an organizational structure for a new project.")
-            if "Error" in org_structure:
-                print(f"Error generating organizational structure: {org_structure}")
-              
-
-            print(f"Generated Organizational Structure: {org_structure}")  # Debugging output
-
-            # Step 2: Generate swarm code using Agent 2
-            swarm_code = swarm_code_generator(org_structure)
-            if "Error" in swarm_code:
-                print(f"Error generating swarm code: {swarm_code}")
-                
-
-            print(f"Generated Swarm Code: {swarm_code}")  # Debugging output
-
-            # Step 3: Write the generated code to a Python file
-            file_name = f"generated_code_{datetime.now().strftime('%Y%m%d%H%M%S')}.py"
-            print(f"About to save code to: {file_name}")  # Debugging output
-            with open(file_name, "w") as f:
-                f.write(swarm_code)
-            print(f"Generated code saved to {file_name}")
-
-            # If the code generation is successful, restart the loop
+            # Handle finished validations without waiting for the rest
+            running = []
+            for future, code_file, item_id, org_structure, attempt in validations:
+                if not future.done():
+                    running.append((future, code_file, item_id, org_structure, attempt))
+                    continue
+                errors = handle_validation(future.result(), code_file, item_id, attempt, max_regenerations)
+                if errors:
+                    regenerations.append((item_id, org_structure, errors, attempt + 1))
+            validations = running
+            queue_depth.set(len(validations), queue="validating")
+            queue_depth.set(len(regenerations), queue="regenerating")
+            if budget is not None and not stopped and not budget.admit():
+                # No new API calls; what is left unfinished stays in the journal for `resume`
+                print("Budget exhausted, stopping once the files being validated are done")
+                stopped = True
+                designs = iter(())
+            if stopped:
+                regenerations.clear()
+
+            if regenerations:
+                # Failed and resumed items go back to Agent 2 before any new design
+                item_id, org_structure, errors, attempt = regenerations.popleft()
+                if errors and needs_escalation(item_id):
+                    # The small model's design failed; the escalation model redesigns it
+                    with track_usage() as usage:
+                        redesign = design_structure(escalation_model)
+                    org_structure = escalated(item_id, redesign, usage.totals)
+                    if org_structure is None:
+                        continue
+                    errors, attempt = None, 0
+                else:
+                    print(f"Regenerating swarm code (attempt {attempt + 1})")
+            elif next(designs, None) is not None:
+                # Step 1: Generate organizational structure using Agent 1
+                design_model = stage_models["design"]
+                with track_usage() as usage:
+                    org_structure = design_structure(design_model)
+                if org_structure is None:
+                    continue
+                if org_structure.startswith("Error:"):
+                    print(f"Error generating organizational structure: {org_structure}")
+                    continue
+
+                print(f"Generated Organizational Structure: {org_structure}")  # Debugging output
+                item_id = journal.start(org_structure, design_model, usage.totals)
+                errors, attempt = None, 0
+            elif validations:
+                wait([future for future, *_ in validations], return_when=FIRST_COMPLETED)
+                continue
+            else:
+                break
+
+            # Step 2: Generate swarm code using Agent 2, unless a template or an earlier file covers the design
+            usage = Usage()
+            swarm_code, code_model = local_code(org_structure, errors)
+            if swarm_code is not None:
+                code_file = GeneratedCodeFile()
+            else:
+                code_model = budget_code_model()
+                with timed_stage("code"), use_model(code_model), track_usage(usage), GeneratedCodeFile() as code_file:
+                    swarm_code = run_agent(build_agents().swarm_code_generator, code_task(org_structure, errors))
+                code_sources.inc(source="model")
+                if swarm_code.startswith("Error:"):
+                    code_file.discard()
+                    print(f"Error generating swarm code: {swarm_code}")
+                    # A failed call uses up an attempt like code that failed validation
+                    journal.charge(item_id, usage.totals)
+                    if attempt < max_regenerations:
+                        regenerations.append((item_id, org_structure, errors, attempt + 1))
+                    else:
+                        drop_exhausted(item_id)
+                    continue
+
+                print(f"Generated Swarm Code: {swarm_code}")  # Debugging output
+            journal.generated(item_id, swarm_code, attempt, code_model, usage.totals)
+
+            # Step 3: Validate in the background; the file is written once it passes
+            print("Submitting generated code for validation")  # Debugging output
+            validations.append((submit_validation(swarm_code), code_file, item_id, org_structure, attempt))
+
+            # Restart the loop for a new iteration while validation runs
             print("Restarting the loop for a new iteration...")
-            # Continue here might not be needed if you want to stop the loop once it writes to file
-             # Use break to exit after writing the code once (if desired)
 
         except Exception as e:
             print(f"Error: {e}")
             continue  # If there's an error, restart the loop from the top
 
+# Build the prompt an agent would send for a task, so the async pipeline can
+# call the model directly with each agent's system prompt
+def agent_prompt(system_prompt, task):
+    return f"System: {system_prompt}\n\nHuman: {task}"
+
+async def async_repair_design(org_structure, model_name):
+    problems = needs_repair(org_structure)
+    if problems is None:
+        return org_structure
+    with timed_stage("repair"), use_model(model_name), use_response_format(JSON_MODE):
+        answer = await async_model(design_schema.repair_task(org_structure, problems[1]))
+    return repaired(org_structure, *problems, answer)
+
+# Async stage 1 with duplicate avoidance, as design_structure
+async def async_design_structure(model_name):
+    excluded = []
+    for _ in range(MAX_REDESIGNS + 1):
+        with timed_stage("design"), use_model(model_name):
+            org_structure = await async_model(agent_prompt(ORGANIZATIONAL_DESIGNER_PROMPT, design_task(excluded)))
+        if not is_duplicate(org_structure, excluded):
+            return await async_repair_design(org_structure, model_name)
+    print("Skipping code generation for a repeated organizational structure")
+    return None
+
+# Stage 1: keep designer calls in flight and hand each result to stage 2
+async def design_worker(claims, org_queue):
+    for _ in claims:
+        if budget is not None and not await budget.admit_async():
+            print("Budget exhausted, no more designs")
+            break
+        design_model = stage_models["design"]
+        with track_usage() as usage:
+            org_structure = await async_design_structure(design_model)
+        if org_structure is None:
+            continue
+        if org_structure.startswith("Error:"):
+            print(f"Error generating organizational structure: {org_structure}")
+            continue
+        print(f"Generated Organizational Structure: {org_structure}")
+        await org_queue.put((journal.start(org_structure, design_model, usage.totals), org_structure, None, 0, None))
+
+# Stage 2: turn queued organizational structures into swarm code files,
+# regenerating only the items whose code fails validation
+async def code_worker(org_queue, max_regenerations):
+    while True:
+        item_id, org_structure, errors, attempt, swarm_code = await org_queue.get()
+        try:
+            if swarm_code is None and attempt > max_regenerations:
+                drop_exhausted(item_id)
+            # Code resumed from the journal is still validated, whatever its attempt
+            while attempt <= max_regenerations or swarm_code is not None:
+                if swarm_code is None:
+                    swarm_code, source = local_code(org_structure, errors)
+                    if swarm_code is not None:
+                        journal.generated(item_id, swarm_code, attempt, source)
+                if swarm_code is not None:
+                    # Rendered from a template, reused, or resumed with its code already generated
+                    code_file = GeneratedCodeFile()
+                else:
+                    if budget is not None and not await budget.admit_async():
+                        # Left in the journal for `resume`
+                        break
+                    code_model = budget_code_model()
+                    with timed_stage("code"), use_model(code_model), track_usage() as usage, GeneratedCodeFile() as code_file:
+                        swarm_code = await async_model(agent_prompt(SWARM_CODE_GENERATOR_PROMPT, code_task(org_structure, errors)))
+                    code_sources.inc(source="model")
+                    if swarm_code.startswith("Error:"):
+                        code_file.discard()
+                        print(f"Error generating swarm code: {swarm_code}")
+                        swarm_code = None
+                        # A failed call uses up an attempt like code that failed validation
+                        journal.charge(item_id, usage.totals)
+                        if attempt >= max_regenerations:
+                            drop_exhausted(item_id)
+                            break
+                        attempt += 1
+                        continue
+                    journal.generated(item_id, swarm_code, attempt, code_model, usage.totals)
+                validation = await asyncio.wrap_future(submit_validation(swarm_code))
+                swarm_code = None
+                errors = handle_validation(validation, code_file, item_id, attempt, max_regenerations)
+                if not errors:
+                    break
+                if needs_escalation(item_id):
+                    # The small model's design failed; the escalation model redesigns it
+                    with track_usage() as usage:
+                        redesign = await async_design_structure(escalation_model)
+                    org_structure = escalated(item_id, redesign, usage.totals)
+                    if org_structure is None:
+                        break
+                    errors, attempt = None, 0
+                else:
+                    attempt += 1
+        except Exception as e:
+            print(f"Error: {e}")
+        finally:
+            org_queue.task_done()
+
+# Pipelined main loop: `designers` stage-1 calls in flight at once, feeding a
+# bounded queue drained by `generators` concurrent stage-2 calls
+async def async_main_loop(iterations=None, designers=4, generators=4, max_regenerations=MAX_REGENERATIONS):
+    org_queue = asyncio.Queue(maxsize=generators * 2)
+    queue_depth.set_function(org_queue.qsize, queue="designed")
+    # Shared iterator, so every iteration is claimed by exactly one designer
+    claims = design_claims(iterations)
+    code_tasks = [asyncio.create_task(code_worker(org_queue, max_regenerations)) for _ in range(generators)]
+    try:
+        for item in journal.unfinished():
+            await org_queue.put(item)
+        await asyncio.gather(*(design_worker(claims, org_queue) for _ in range(designers)))
+        await org_queue.join()
+    finally:
+        for task in code_tasks:
+            task.cancel()
+        await asyncio.gather(*code_tasks, return_exceptions=True)
+
 # Start the main loop
 if __name__ == "__main__":
-    main_loop()
+    import sys
+    import cli
+    cli.main(["generate", *sys.argv[1:]])
@@ -0,0 +1,115 @@
+import importlib.util
+import json
+import keyword
+import os
+import re
+
+import design_schema
+
+# Local fast path for the code stage. The code generator mostly fills one of
+# a handful of architecture templates with the design's agent names and
+# system prompts, so when the designer's answer carries those as structured
+# fields and names an architecture we have a template for, the file body is
+# rendered here with Jinja2 instead of paying for a code generation call.
+# Anything else (no structured fields, or an architecture such as
+# "Distributed") still goes to the code generator.
+#
+# Templates live in templates/, one per architecture, and render only the
+# body; postprocess adds the boilerplate like it does for model output.
+# Without Jinja2 installed every design goes to the code generator.
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+ARCHITECTURES = ("Hierarchical", "Parallel", "Sequential", "Spreadsheet", "Default")
+JINJA2 = importlib.util.find_spec("jinja2") is not None
+
+# How the designer is asked to state its design, appended to its prompt
+DESIGN_FIELDS_INSTRUCTIONS = f"""
+    After the configuration, repeat it as structured fields in a ```json block:
+    {{"organization": "...", "mission": "...", "use_case": "...", "architecture": "...",
+     "agents": [{{"name": "...", "system_prompt": "..."}}]}}
+    "architecture" is one of {", ".join(ARCHITECTURES[:-1])}, or the name of another architecture if none of them fits.
+    List between two and six agents; for a Hierarchical swarm, list the supervising agent first.
+    """
+
+_environment = None
+
+
+def _oneline(text):
+    return " ".join(str(text).split())
+
+# Jinja2 is imported and the templates compiled once, on first render
+def environment():
+    global _environment
+    if _environment is None:
+        import jinja2
+        _environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+            undefined=jinja2.StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=True,
+            autoescape=False,
+        )
+        # Strings go into the generated source as (double-quoted) Python literals
+        _environment.filters["py"] = lambda value: json.dumps(value, ensure_ascii=False)
+    return _environment
+
+
+# The structured fields from a designer answer, or None when it has none or
+# they don't match the schema
+def parse_design(text):
+    fields, errors = design_schema.check(text)
+    return None if errors else fields
+
+# "Spreadsheet-like", "hierarchical structure" -> the template it maps to, or None
+def template_architecture(name):
+    words = re.findall(r"[a-z]+", name.lower())
+    if not words:
+        return None
+    for architecture in ARCHITECTURES:
+        if words[0] == architecture.lower():
+            return architecture
+    return None
+
+# Agent names end up in AgentRearrange flows, where "," and "->" are syntax
+def _agent_name(name):
+    return re.sub(r"\s*(?:->|,)\s*", " ", _oneline(name)).strip()
+
+def _variable(name, taken):
+    base = re.sub(r"\W+", "_", name.lower()).strip("_") or "agent"
+    if base[0].isdigit() or keyword.iskeyword(base):
+        base = f"agent_{base}"
+    variable, n = base, 2
+    while variable in taken:
+        variable, n = f"{base}_{n}", n + 1
+    taken.add(variable)
+    return variable
+
+# Render the body of a swarm file for a designer answer; None when the answer
+# has no structured fields, names an architecture without a template, or
+# Jinja2 is not installed
+def render_design(text):
+    if not JINJA2:
+        return None
+    design = parse_design(text)
+    if design is None:
+        return None
+    architecture = template_architecture(design["architecture"])
+    if architecture is None:
+        return None
+    taken = set()
+    names = set()
+    agents = []
+    for agent in design["agents"]:
+        name = _agent_name(agent["name"]) or "Agent"
+        # AgentRearrange looks agents up by name, so names must be unique
+        while name in names:
+            name = f"{name} {len(names) + 1}"
+        names.add(name)
+        agents.append({"name": name, "var": _variable(name, taken), "system_prompt": str(agent["system_prompt"]).strip()})
+    # A flow needs at least one "->"
+    if architecture == "Sequential" and len(agents) < 2:
+        architecture = "Default"
+    fields = {key: _oneline(design.get(key) or "") for key in ("organization", "mission", "use_case")}
+    template = environment().get_template(f"{architecture.lower()}.py.j2")
+    return template.render(design=fields, architecture=architecture, agents=agents)
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import transport
+from fake_groq_server import FakeGroqServer
+
+
+# A local Groq API with no latency; tests that call the model point the
+# swarm_generator clients at it
+@pytest.fixture
+def fake_server(monkeypatch):
+    server = FakeGroqServer(latency="fixed:0", tokens_per_sec=1e9, seed=0)
+    monkeypatch.setenv("GROQ_BASE_URL", server.start())
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    yield server
+    server.stop()
+
+# swarm_generator with fresh clients (and connection pools, which an async
+# client can't carry over between event loops) for the fake server
+@pytest.fixture
+def sg(fake_server, monkeypatch):
+    import swarm_generator
+    monkeypatch.setattr(transport, "_clients", {})
+    swarm_generator.groq_client.cache_clear()
+    swarm_generator.async_groq_client.cache_clear()
+    yield swarm_generator
+    swarm_generator.groq_client.cache_clear()
+    swarm_generator.async_groq_client.cache_clear()
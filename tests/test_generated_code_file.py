@@ -0,0 +1,45 @@
+import os
+import stat
+
+import swarm_generator as sg
+
+
+def test_published_file_has_the_usual_mode(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    code_file = sg.GeneratedCodeFile()
+    file_name = code_file.publish("print('hello')\n")
+    assert stat.S_IMODE(os.stat(file_name).st_mode) == sg.FILE_MODE
+    with open(file_name) as f:
+        assert f.read() == "print('hello')\n"
+    assert not os.path.exists(code_file.part_path)
+
+def test_same_second_publishes_do_not_clobber(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    names = {sg.GeneratedCodeFile().publish(f"x = {n}\n") for n in range(3)}
+    assert len(names) == 3
+
+# An item resumed past a lower --max-regenerations is dropped, not re-queued forever
+def test_resumed_item_past_its_regenerations_is_dropped(monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+    from run_journal import RunJournal
+    journal = RunJournal()
+    monkeypatch.setattr(sg, "journal", journal)
+    item_id = journal.start("Organization: Retail")
+    journal.generated(item_id, "x =", attempt=3)
+    journal.validated(item_id, SimpleNamespace(ok=False, errors=["SyntaxError"]))
+    asyncio.run(sg.async_main_loop(iterations=0, max_regenerations=1))
+    assert journal.items == {}
+
+# A code call that fails uses up an attempt and the item is dropped once they run out
+def test_failed_code_calls_use_up_attempts(sg, fake_server, monkeypatch):
+    import asyncio
+    from run_journal import RunJournal
+    fake_server.error_rate_5xx = 1.0
+    journal = RunJournal()
+    monkeypatch.setattr(sg, "journal", journal)
+    monkeypatch.setattr(sg, "async_model", sg.AsyncGroqModel(limiter=None))
+    journal.start("Organization: Retail")
+    asyncio.run(sg.async_main_loop(iterations=0, max_regenerations=1))
+    assert fake_server.requests == 2
+    assert journal.items == {}
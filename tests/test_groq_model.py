@@ -0,0 +1,85 @@
+import asyncio
+
+from hedging import HedgePolicy
+from rate_limiter import RateLimiter
+from response_cache import ResponseCache
+
+
+def test_sdk_does_not_retry_rate_limited_calls(sg, fake_server):
+    fake_server.error_rate_429 = 1.0
+    model = sg.GroqModel(limiter=None)
+    assert model("Hello").startswith("Error:")
+    # Without a limiter GroqModel gives up on the first 429; any extra hit came from the SDK
+    assert fake_server.requests == 1
+
+def test_retries_go_through_the_limiter(sg, fake_server):
+    fake_server.error_rate_429 = 1.0
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1_000_000)
+    retries = sg.retries.total()
+    model = sg.GroqModel(limiter=limiter, max_retries=1)
+    assert model("Hello").startswith("Error:")
+    assert fake_server.requests == 2
+    assert sg.retries.total() == retries + 1
+
+def test_async_model_returns_content(sg, fake_server):
+    model = sg.AsyncGroqModel(limiter=None)
+    answer = asyncio.run(model("Generate an organizational structure for a new project."))
+    assert not answer.startswith("Error:")
+    assert fake_server.requests == 1
+
+def test_unused_reservation_is_refunded(sg, fake_server):
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1_000_000)
+    limiter.tokens.refill_per_sec = 0
+    model = sg.GroqModel(limiter=limiter)
+    with sg.track_usage() as usage:
+        assert not model("Hello").startswith("Error:")
+    used = usage.prompt_tokens + usage.completion_tokens
+    assert used < limiter.request_cost(model._messages("Hello"))
+    # Only the tokens the call used stay taken from the bucket
+    assert limiter.tokens.tokens == 1_000_000 - used
+
+def test_hedge_loser_is_charged_and_refunded(sg, fake_server):
+    latencies = iter([0.5, 0.0])
+    fake_server.sample_latency = lambda rng: next(latencies)
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1_000_000)
+    limiter.tokens.refill_per_sec = 0
+    hedge = HedgePolicy(budget=1.0, min_samples=1)
+    model = sg.GroqModel(limiter=limiter, hedge=hedge)
+    hedge.record((model.model_name, False), 0.05)
+    with sg.track_usage() as usage:
+        assert not model("Hello").startswith("Error:")
+        model._hedge_executor.shutdown(wait=True)
+    assert fake_server.requests == 2
+    # Both calls are charged, and each hands back what it did not use
+    used = usage.prompt_tokens + usage.completion_tokens
+    assert limiter.tokens.tokens == 1_000_000 - used
+
+def test_replay_returns_recorded_answers_in_order(sg, fake_server, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    model = sg.GroqModel(limiter=None, cache=ResponseCache(path, mode="record"))
+    recorded = [model(sg.DESIGN_TASK) for _ in range(4)]
+    assert len(set(recorded)) > 1
+    model.cache = ResponseCache(path, mode="replay")
+    assert [model(sg.DESIGN_TASK) for _ in range(4)] == recorded
+    assert fake_server.requests == 4
+
+def test_async_hedge_loser_is_charged_and_refunded(sg, fake_server):
+    latencies = iter([0.5, 0.0])
+    fake_server.sample_latency = lambda rng: next(latencies)
+    limiter = RateLimiter(requests_per_minute=1000, tokens_per_minute=1_000_000)
+    limiter.tokens.refill_per_sec = 0
+    hedge = HedgePolicy(budget=1.0, min_samples=1)
+    model = sg.AsyncGroqModel(limiter=limiter, hedge=hedge)
+    hedge.record((model.model_name, False), 0.05)
+
+    async def call():
+        with sg.track_usage() as usage:
+            assert not (await model("Hello")).startswith("Error:")
+        return usage
+
+    usage = asyncio.run(call())
+    assert fake_server.requests == 2
+    # The cancelled loser is charged its prompt and the rest of its reservation handed back
+    used = usage.prompt_tokens + usage.completion_tokens
+    assert usage.prompt_tokens > sg.estimate_tokens(model._messages("Hello"))
+    assert limiter.tokens.tokens == 1_000_000 - used
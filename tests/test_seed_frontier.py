@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dev"))
+
+from seed_frontier import SeedFrontier
+
+
+# main_loop hands a seed back when Agent 1 fails on it; the seed must stay
+# pending, in this run and after a restart
+def test_failed_seed_stays_pending(tmp_path):
+    path = str(tmp_path / "frontier.json")
+    frontier = SeedFrontier(path, architectures=["Parallel"])
+    frontier.extend(["Retail, Parallel structure"])
+    seed = frontier.pop()
+    frontier.requeue(seed)
+    assert SeedFrontier(path, architectures=["Parallel"]).pop() == seed
+    assert frontier.pop() == seed
+
+def test_deferred_seed_waits_for_the_next_run(tmp_path):
+    path = str(tmp_path / "frontier.json")
+    frontier = SeedFrontier(path)
+    frontier.extend(["Retail"])
+    frontier.requeue(frontier.pop(), retry=False)
+    assert frontier.pop() is None
+    assert SeedFrontier(path).pop() == "Retail"
+
+def test_changes_are_logged_and_compacted(tmp_path):
+    path = str(tmp_path / "frontier.json")
+    frontier = SeedFrontier(path, architectures=["Parallel"], compact_every=3)
+    frontier.extend(["Retail, Parallel structure", "Banking"])
+    frontier.mark_used(frontier.pop(), "Parallel")
+    assert not os.path.exists(path)
+    # Restarted before any compaction: the state comes back from the log
+    restarted = SeedFrontier(path, architectures=["Parallel"])
+    assert restarted.used == {"Retail, Parallel structure"}
+    assert restarted.counts["Parallel"] == 1
+    assert restarted.pop() == "Banking"
+    frontier.extend(["Travel"])
+    assert os.path.getsize(path + ".log") == 0
+    assert SeedFrontier(path).counts["Parallel"] == 1
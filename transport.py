@@ -0,0 +1,112 @@
+import importlib.util
+import os
+import threading
+
+# One pooled HTTP transport for every Groq client in the process.
+#
+# Each Groq/AsyncGroq client otherwise builds its own httpx client, so every
+# model instance pays for its own TCP and TLS setup, and a short designer
+# call can spend a visible share of its latency on the handshake. All sync
+# callers share one httpx.Client and all async callers one
+# httpx.AsyncClient, with keep-alive, HTTP/2 when the optional `h2` package
+# is installed, a connection cap sized to the run's concurrency and separate
+# connect and read timeouts. (A sync and an async client can't share sockets,
+# so there are two pools, one per kind of caller.)
+#
+# configure() must run before the first client is built; the CLI calls it
+# with the run's concurrency. pool_stats() reports utilization for metrics.
+# httpx itself is imported when the first client is built.
+
+MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "16"))
+CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("GROQ_READ_TIMEOUT", "120"))
+# Idle connections are kept this long before they are closed
+KEEPALIVE_EXPIRY = 60.0
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+_settings = {"max_connections": MAX_CONNECTIONS, "connect_timeout": CONNECT_TIMEOUT, "read_timeout": READ_TIMEOUT}
+_clients = {}
+_lock = threading.Lock()
+# Connections opened so far (a TCP connect, plus TLS for https)
+_opened = 0
+
+
+def configure(max_connections=None, connect_timeout=None, read_timeout=None):
+    with _lock:
+        if _clients:
+            raise RuntimeError("transport.configure() must be called before the first client is built")
+        if max_connections is not None:
+            _settings["max_connections"] = max_connections
+        if connect_timeout is not None:
+            _settings["connect_timeout"] = connect_timeout
+        if read_timeout is not None:
+            _settings["read_timeout"] = read_timeout
+
+def _client_options():
+    import httpx
+    max_connections = _settings["max_connections"]
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        # write and pool (waiting for a free connection) share the read budget
+        "timeout": httpx.Timeout(_settings["read_timeout"], connect=_settings["connect_timeout"]),
+        "http2": HTTP2,
+        "follow_redirects": True,
+    }
+
+def _connection_opened():
+    global _opened
+    with _lock:
+        _opened += 1
+
+# httpcore trace callbacks: count each new connection as it completes
+def _trace(event, info):
+    if event == "connection.connect_tcp.complete":
+        _connection_opened()
+
+async def _async_trace(event, info):
+    _trace(event, info)
+
+def _add_trace(request):
+    request.extensions["trace"] = _trace
+
+async def _add_async_trace(request):
+    request.extensions["trace"] = _async_trace
+
+def http_client():
+    import httpx
+    with _lock:
+        if "sync" not in _clients:
+            _clients["sync"] = httpx.Client(event_hooks={"request": [_add_trace]}, **_client_options())
+        return _clients["sync"]
+
+def async_http_client():
+    import httpx
+    with _lock:
+        if "async" not in _clients:
+            _clients["async"] = httpx.AsyncClient(event_hooks={"request": [_add_async_trace]}, **_client_options())
+        return _clients["async"]
+
+# Utilization of the shared pools: connections open, how many are carrying a
+# request, requests in flight or waiting for a connection, and connections
+# opened since start (opened much above `connections` means keep-alive is not
+# holding). Reads httpcore's pool state, which httpx doesn't expose publicly.
+def pool_stats():
+    stats = {"connections": 0, "active": 0, "idle": 0, "requests": 0, "opened": _opened,
+             "max_connections": _settings["max_connections"], "http2": HTTP2}
+    with _lock:
+        clients = list(_clients.values())
+    for client in clients:
+        pool = getattr(client._transport, "_pool", None)
+        if pool is None:
+            continue
+        connections = list(pool._connections)
+        idle = sum(1 for connection in connections if connection.is_idle())
+        stats["connections"] += len(connections)
+        stats["idle"] += idle
+        stats["active"] += len(connections) - idle
+        stats["requests"] += len(pool._requests)
+    return stats
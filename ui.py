@@ -0,0 +1,43 @@
+import gradio as gr
+
+import swarm_generator as sg
+from postprocess import validate_code
+
+# Gradio front end for one-off generations: each click designs one
+# organizational structure, generates its swarm code, validates it and
+# publishes it the same way the batch loop does.
+
+
+def generate_one():
+    org_structure = sg.design_structure()
+    if org_structure is None:
+        return "", "", "Every design repeated an earlier organization; try again."
+    code_file = sg.GeneratedCodeFile()
+    try:
+        swarm_code, _ = sg.local_code(org_structure, None)
+        if swarm_code is None:
+            with sg.timed_stage("code"), code_file:
+                swarm_code = sg.run_agent(sg.build_agents().swarm_code_generator, sg.code_task(org_structure))
+            sg.code_sources.inc(source="model")
+        validation = validate_code(swarm_code)
+    except Exception:
+        code_file.discard()
+        raise
+    if not validation.ok:
+        code_file.discard()
+        sg.validation_failures.inc()
+        return org_structure, validation.code, f"Failed validation: {'; '.join(validation.errors)}"
+    with sg.timed_stage("write"):
+        file_name = code_file.publish(validation.code)
+    sg.files_written.inc()
+    return org_structure, validation.code, f"Saved to {file_name}"
+
+def build_ui():
+    with gr.Blocks(title="Swarm Architecture Generator") as demo:
+        gr.Markdown("# Swarm Architecture Generator")
+        button = gr.Button("Generate")
+        status = gr.Textbox(label="Status", interactive=False)
+        org_structure = gr.Textbox(label="Organizational Structure", lines=12, interactive=False)
+        code = gr.Code(label="Swarm Code", language="python")
+        button.click(generate_one, outputs=[org_structure, code, status])
+    return demo
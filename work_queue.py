@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# Durable job queue shared by generator workers, in SQLite with WAL so any
+# number of processes can claim from it concurrently.
+#
+# A job asks for `designs` organizational designs, each of which becomes a
+# generated file unless its code keeps failing validation. Claiming a job leases it to one
+# worker until `lease_expires`; the worker heartbeats to extend the lease
+# while it runs and marks the job done once its run journal has nothing left
+# unfinished; otherwise the job is released to be resumed. A job whose lease runs out
+# (its worker died or hung) is claimable again, and after `max_attempts`
+# claims it is marked failed instead of being retried forever.
+#
+# SQLite locking needs a local disk or a network filesystem with working
+# POSIX locks; put the queue file somewhere every worker can reach.
+class WorkQueue:
+    STATES = ("pending", "leased", "done", "failed")
+
+    def __init__(self, path="work_queue.sqlite", lease_seconds=300, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, designs INTEGER NOT NULL, "
+            "state TEXT NOT NULL DEFAULT 'pending', owner TEXT, lease_expires REAL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, error TEXT, created REAL NOT NULL, finished REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires)")
+        # Queues made before the column was named for what it counts
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if "files" in columns:
+            self._conn.execute("ALTER TABLE jobs RENAME COLUMN files TO designs")
+
+    # Split `designs` into jobs of at most `job_size` designs each
+    def enqueue(self, designs, job_size=5):
+        now = time.time()
+        sizes = [min(job_size, designs - start) for start in range(0, designs, job_size)]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.executemany("INSERT INTO jobs (designs, created) VALUES (?, ?)", [(size, now) for size in sizes])
+            self._conn.execute("COMMIT")
+        return len(sizes)
+
+    # Lease the oldest available job to `owner`; returns (job_id, designs) or None
+    def claim(self, owner):
+        with self._lock:
+            while True:
+                now = time.time()
+                # IMMEDIATE takes the write lock up front, so two workers can't claim the same row
+                self._conn.execute("BEGIN IMMEDIATE")
+                row = self._conn.execute(
+                    "SELECT id, designs, attempts FROM jobs "
+                    "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                job_id, designs, attempts = row
+                if attempts >= self.max_attempts:
+                    self._conn.execute(
+                        "UPDATE jobs SET state = 'failed', owner = NULL, finished = ? WHERE id = ?",
+                        (now, job_id),
+                    )
+                    self._conn.execute("COMMIT")
+                    continue
+                self._conn.execute(
+                    "UPDATE jobs SET state = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (owner, now + self.lease_seconds, job_id),
+                )
+                self._conn.execute("COMMIT")
+                return job_id, designs
+
+    # Extend a lease; False when the job is no longer held by `owner`
+    def heartbeat(self, job_id, owner):
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND owner = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, job_id, owner),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, owner):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'done', finished = ? WHERE id = ? AND owner = ?",
+                (time.time(), job_id, owner),
+            )
+
+    # Give a job back after an error so another claim can retry it
+    def release(self, job_id, owner, error):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = 'pending', owner = NULL, lease_expires = NULL, error = ? WHERE id = ? AND owner = ?",
+                (error, job_id, owner),
+            )
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*), COALESCE(SUM(designs), 0) FROM jobs GROUP BY state").fetchall()
+        counts = {state: (0, 0) for state in self.STATES}
+        counts.update({state: (jobs, designs) for state, jobs, designs in rows})
+        return counts
+
+    # True while any job is pending or leased (a leased job may still expire back to pending)
+    def unfinished(self):
+        counts = self.counts()
+        return counts["pending"][0] + counts["leased"][0] > 0
+
+    def close(self):
+        self._conn.close()
+
+
+# Keeps a job's lease alive from a background thread while the pipeline runs
+class Heartbeat:
+    def __init__(self, queue, job_id, owner):
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(self.job_id, self.owner):
+                print(f"Lost the lease on job {self.job_id}; another worker may repeat it")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# Run one job through the normal organizational designer -> swarm code
+# generator pipeline. Each job has its own run journal next to the queue, so
+# a job reclaimed from a dead worker resumes from where that worker stopped
+# instead of starting over. The journal is only removed once nothing in it is
+# left unfinished; returns how many items are.
+#
+# Async jobs all run on the worker's one event loop: the shared AsyncGroq
+# client and its connection pool stay bound to the loop they first ran on.
+def run_job(sg, job_id, designs, args, loop=None):
+    journal_path = os.path.join(args.journal_dir, f"job_{job_id}.json")
+    sg.enable_journal(journal_path, resume=True)
+    if loop is None:
+        sg.main_loop(designs, max_regenerations=args.max_regenerations)
+    else:
+        loop.run_until_complete(sg.async_main_loop(
+            iterations=designs,
+            designers=args.concurrency,
+            generators=args.code_concurrency or args.concurrency,
+            max_regenerations=args.max_regenerations,
+        ))
+    unfinished = len(list(sg.journal.unfinished()))
+    if not unfinished:
+        os.remove(journal_path)
+    return unfinished
+
+# Claim and run jobs until the queue has nothing left for this worker
+def worker(args):
+    sys.path.insert(0, HERE)
+    import swarm_generator as sg
+    import transport
+
+    transport.configure(max_connections=args.concurrency + (args.code_concurrency or args.concurrency))
+    if args.stream:
+        sg.model.stream = sg.async_model.stream = True
+    if args.results_store:
+        sg.enable_results_store(args.results_store)
+    sg.enable_ledger(args.ledger)
+    queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    os.makedirs(args.journal_dir, exist_ok=True)
+    loop = None if args.concurrency == 1 and args.code_concurrency is None else asyncio.new_event_loop()
+    while True:
+        job = queue.claim(owner)
+        if job is None:
+            if not queue.unfinished():
+                break
+            # Other workers still hold leases; wait in case one of them dies
+            time.sleep(min(5, args.lease_seconds / 3))
+            continue
+        job_id, designs = job
+        print(f"Worker {owner} running job {job_id} ({designs} designs)")
+        try:
+            with Heartbeat(queue, job_id, owner):
+                unfinished = run_job(sg, job_id, designs, args, loop)
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            queue.release(job_id, owner, str(e))
+            continue
+        if unfinished:
+            # The journal is kept, so the next claim resumes these items
+            print(f"Job {job_id} left {unfinished} items unfinished")
+            queue.release(job_id, owner, f"{unfinished} items unfinished")
+            continue
+        queue.complete(job_id, owner)
+    if loop is not None:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+    queue.close()
+    sg.ledger.close()
+
+def print_status(queue):
+    for state, (jobs, designs) in queue.counts().items():
+        print(f"{state:<8}{jobs:>8} jobs{designs:>8} designs")
+
+# Coordinator for one machine: queue the designs and run `processes` local
+# workers over them. The API quota is split evenly between the workers;
+# workers on other machines can join with the `worker` command.
+def run(args):
+    queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    if args.designs:
+        queue.enqueue(args.designs, job_size=args.job_size)
+    env = dict(os.environ)
+    env["GROQ_RPM"] = str(max(1, int(os.getenv("GROQ_RPM", "30")) // args.processes))
+    env["GROQ_TPM"] = str(max(1, int(os.getenv("GROQ_TPM", "6000")) // args.processes))
+    command = [sys.executable, os.path.abspath(__file__), "worker"] + worker_arguments(args)
+    started = time.perf_counter()
+    processes = [subprocess.Popen(command, env=env) for _ in range(args.processes)]
+    for process in processes:
+        process.wait()
+    print(f"Finished in {time.perf_counter() - started:.1f} s")
+    print_status(queue)
+    queue.close()
+
+def worker_arguments(args):
+    arguments = [
+        "--queue", args.queue,
+        "--journal-dir", args.journal_dir,
+        "--lease-seconds", str(args.lease_seconds),
+        "--max-attempts", str(args.max_attempts),
+        "--concurrency", str(args.concurrency),
+        "--max-regenerations", str(args.max_regenerations),
+    ]
+    if args.code_concurrency is not None:
+        arguments += ["--code-concurrency", str(args.code_concurrency)]
+    if args.stream:
+        arguments.append("--stream")
+    if args.results_store:
+        arguments += ["--results-store", args.results_store]
+    arguments += ["--ledger", args.ledger]
+    return arguments
+
+def main():
+    parser = argparse.ArgumentParser(description="Run generator workers over a shared durable job queue")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    def add_queue_arguments(subparser):
+        subparser.add_argument("--queue", default="work_queue.sqlite", help="SQLite queue file shared by all workers")
+        subparser.add_argument("--lease-seconds", type=float, default=300, help="how long a job is held without a heartbeat")
+        subparser.add_argument("--max-attempts", type=int, default=3, help="claims before a job is marked failed")
+
+    def add_worker_arguments(subparser):
+        subparser.add_argument("--journal-dir", default="job_journals", help="directory for per-job run journals")
+        subparser.add_argument("--concurrency", type=int, default=1, help="designer calls in flight per worker")
+        subparser.add_argument("--code-concurrency", type=int, default=None, help="swarm code calls in flight per worker")
+        subparser.add_argument("--max-regenerations", type=int, default=2, help="retries for code that fails validation")
+        subparser.add_argument("--stream", action="store_true", help="stream completions")
+        subparser.add_argument("--results-store", default=None, help="content-addressed results store shared by the workers")
+        subparser.add_argument("--ledger", default="cost_ledger.jsonl", help="token and cost ledger the workers append to")
+
+    enqueue = subcommands.add_parser("enqueue", help="add jobs to the queue")
+    add_queue_arguments(enqueue)
+    enqueue.add_argument("--designs", "--files", dest="designs", type=int, required=True)
+    enqueue.add_argument("--job-size", type=int, default=5, help="designs per job")
+
+    worker_parser = subcommands.add_parser("worker", help="claim and run jobs until the queue is drained")
+    add_queue_arguments(worker_parser)
+    add_worker_arguments(worker_parser)
+
+    run_parser = subcommands.add_parser("run", help="enqueue designs and run local worker processes over them")
+    add_queue_arguments(run_parser)
+    add_worker_arguments(run_parser)
+    run_parser.add_argument("--designs", "--files", dest="designs", type=int, default=0, help="designs to enqueue before starting")
+    run_parser.add_argument("--job-size", type=int, default=5, help="designs per job")
+    run_parser.add_argument("--processes", type=int, default=os.cpu_count(), help="local worker processes")
+
+    status = subcommands.add_parser("status", help="show job counts by state")
+    add_queue_arguments(status)
+
+    args = parser.parse_args()
+    if args.command == "enqueue":
+        queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+        print(f"Queued {queue.enqueue(args.designs, job_size=args.job_size)} jobs")
+        queue.close()
+    elif args.command == "worker":
+        worker(args)
+    elif args.command == "run":
+        run(args)
+    else:
+        queue = WorkQueue(args.queue)
+        print_status(queue)
+        queue.close()
+
+if __name__ == "__main__":
+    main()